@@ -49,7 +49,10 @@ def experiment(args):
         else args.id
     logger = Logger(
         experiment_name, params['env_name'],
-        args.seed, params, args.log_dir, args.overwrite)
+        args.seed, params, args.log_dir, args.overwrite,
+        prometheus=args.prometheus,
+        resume=args.resume,
+        quiet=args.quiet)
 
     params['general_setting']['env'] = env
 
@@ -94,6 +97,8 @@ def experiment(args):
             **params["a2c"],
             **params["general_setting"]
         )
+    if args.resume:
+        agent.load_checkpoint(params['general_setting']['save_dir'])
     agent.train()
 
 
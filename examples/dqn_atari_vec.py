@@ -8,6 +8,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from torchrl.utils import get_args
 from torchrl.utils import get_params
 from torchrl.replay_buffers import BaseReplayBuffer
+from torchrl.replay_buffers import FrameStackReplayBuffer
 from torchrl.utils import Logger
 import torchrl.policies as policies
 import torchrl.networks as networks
@@ -49,14 +50,24 @@ def experiment(args):
         else args.id
     logger = Logger(
         experiment_name, params['env_name'],
-        args.seed, params, args.log_dir, args.overwrite)
+        args.seed, params, args.log_dir, args.overwrite,
+        prometheus=args.prometheus,
+        resume=args.resume,
+        quiet=args.quiet)
 
     params['general_setting']['env'] = env
 
-    replay_buffer = BaseReplayBuffer(
+    buffer_kwargs = {}
+    buffer_cls = BaseReplayBuffer
+    if "frame_stack" in buffer_param:
+        # store each frame once instead of whole stacks
+        buffer_cls = FrameStackReplayBuffer
+        buffer_kwargs["frame_stack"] = buffer_param["frame_stack"]
+    replay_buffer = buffer_cls(
         env_nums=args.vec_env_nums,
         max_replay_buffer_size=int(buffer_param['size']),
-        time_limit_filter=buffer_param['time_limit_filter']
+        time_limit_filter=buffer_param['time_limit_filter'],
+        **buffer_kwargs
     )
     params['general_setting']['replay_buffer'] = replay_buffer
 
@@ -94,6 +105,8 @@ def experiment(args):
             **params["dqn"],
             **params["general_setting"]
         )
+    if args.resume:
+        agent.load_checkpoint(params['general_setting']['save_dir'])
     agent.train()
 
 
@@ -48,7 +48,9 @@ def experiment(args):
         else args.id
     logger = Logger(
         experiment_name , params['env_name'], args.seed, params, args.log_dir,
-        overwrite=args.overwrite
+        overwrite=args.overwrite, prometheus=args.prometheus,
+        resume=args.resume,
+        quiet=args.quiet
     )
 
     params['general_setting']['env'] = env
@@ -90,6 +92,8 @@ def experiment(args):
             **params["ppo"],
             **params["general_setting"]
         )
+    if args.resume:
+        agent.load_checkpoint(params['general_setting']['save_dir'])
     agent.train()
 
 
@@ -13,6 +13,7 @@ import torchrl.policies as policies
 import torchrl.networks as networks
 from torchrl.algo import PPO
 from torchrl.collector.on_policy import VecOnPolicyCollector
+from torchrl.collector.rollout import VecRolloutCollector
 import gym
 import random
 from torchrl.env import get_vec_env
@@ -28,17 +29,25 @@ def experiment(args):
     device = torch.device(
         "cuda:{}".format(args.device) if args.cuda else "cpu")
 
-    env = get_subprocvec_env(
-        params["env_name"],
-        params["env"],
-        args.vec_env_nums,
-        4
-    )
+    if args.rollout_workers:
+        # workers build their own envs, this one only gives the spaces
+        env = get_vec_env(params["env_name"], params["env"], 1)
+    else:
+        env = get_subprocvec_env(
+            params["env_name"],
+            params["env"],
+            args.vec_env_nums,
+            args.proc_nums,
+            start_method=args.start_method,
+            auto_reset=args.auto_reset
+        )
     eval_env = get_subprocvec_env(
         params["env_name"],
         params["env"],
         args.vec_env_nums,
-        4
+        args.proc_nums,
+        start_method=args.start_method,
+        auto_reset=args.auto_reset
     )
     if hasattr(env, "_obs_normalizer"):
         eval_env._obs_normalizer = env._obs_normalizer
@@ -59,7 +68,10 @@ def experiment(args):
         else args.id
     logger = Logger(
         experiment_name, params['env_name'],
-        args.seed, params, args.log_dir, args.overwrite)
+        args.seed, params, args.log_dir, args.overwrite,
+        prometheus=args.prometheus,
+        resume=args.resume,
+        quiet=args.quiet)
     params['general_setting']['env'] = env
 
     replay_buffer = OnPolicyReplayBuffer(
@@ -88,12 +100,26 @@ def experiment(args):
     )
     print(pf)
     print(vf)
-    params['general_setting']['collector'] = VecOnPolicyCollector(
-        vf, env=env, eval_env=eval_env, pf=pf,
-        replay_buffer=replay_buffer, device=device,
-        train_render=False,
-        **params["collector"]
-    )
+    if args.rollout_workers:
+        params['general_setting']['collector'] = VecRolloutCollector(
+            vf, env=env, eval_env=eval_env, pf=pf,
+            replay_buffer=replay_buffer, device=device,
+            train_render=False,
+            env_func=get_vec_env,
+            env_args=[params["env_name"], params["env"],
+                      args.vec_env_nums // args.proc_nums],
+            proc_nums=args.proc_nums,
+            start_method=args.start_method,
+            seed=args.seed,
+            **params["collector"]
+        )
+    else:
+        params['general_setting']['collector'] = VecOnPolicyCollector(
+            vf, env=env, eval_env=eval_env, pf=pf,
+            replay_buffer=replay_buffer, device=device,
+            train_render=False,
+            **params["collector"]
+        )
     params['general_setting']['save_dir'] = osp.join(
         logger.work_dir, "model")
     agent = PPO(
@@ -102,6 +128,8 @@ def experiment(args):
             **params["ppo"],
             **params["general_setting"]
         )
+    if args.resume:
+        agent.load_checkpoint(params['general_setting']['save_dir'])
     agent.train()
 
 
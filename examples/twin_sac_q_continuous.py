@@ -44,7 +44,10 @@ def experiment(args):
         os.path.splitext(args.config)[0])[-1] if args.id is None \
         else args.id
     logger = Logger(
-        experiment_name, params['env_name'], args.seed, params, args.log_dir)
+        experiment_name, params['env_name'], args.seed, params, args.log_dir,
+        prometheus=args.prometheus,
+        resume=args.resume,
+        quiet=args.quiet)
 
     params['general_setting']['env'] = env
 
@@ -93,6 +96,8 @@ def experiment(args):
             **params["twin_sac_q"],
             **params["general_setting"]
         )
+    if args.resume:
+        agent.load_checkpoint(params['general_setting']['save_dir'])
     agent.train()
 
 
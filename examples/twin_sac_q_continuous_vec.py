@@ -17,8 +17,6 @@ from torchrl.algo import TwinSACQ
 from torchrl.collector.base import VecCollector
 from torchrl.env import get_vec_env
 
-import cProfile
-# import r
 
 args = get_args()
 params = get_params(args.config)
@@ -58,7 +56,10 @@ def experiment(args):
         else args.id
     logger = Logger(
         experiment_name, params['env_name'],
-        args.seed, params, args.log_dir, args.overwrite)
+        args.seed, params, args.log_dir, args.overwrite,
+        prometheus=args.prometheus,
+        resume=args.resume,
+        quiet=args.quiet)
 
     params['general_setting']['env'] = env
 
@@ -107,9 +108,10 @@ def experiment(args):
             **params["twin_sac_q"],
             **params["general_setting"]
         )
+    if args.resume:
+        agent.load_checkpoint(params['general_setting']['save_dir'])
     agent.train()
 
 
 if __name__ == "__main__":
-    # cProfile.run()
     experiment(args)
@@ -1,5 +1,4 @@
-from .on_policy import *
-from .off_policy import *
+from torchrl.utils.lazy import lazy_attrs
 
 __all__ = [
     'SAC',
@@ -13,5 +12,22 @@ __all__ = [
     'Reinforce',
     'A2C',
     'PPO',
-    'TRPO'
+    'TRPO',
+    'VMPO'
 ]
+
+__getattr__, __dir__ = lazy_attrs(__name__, {
+    'SAC': '.off_policy.sac',
+    'DDPG': '.off_policy.ddpg',
+    'TwinSAC': '.off_policy.twin_sac',
+    'TwinSACQ': '.off_policy.twin_sac_q',
+    'TD3': '.off_policy.td3',
+    'DQN': '.off_policy.dqn',
+    'BootstrappedDQN': '.off_policy.bootstrapped_dqn',
+    'QRDQN': '.off_policy.qrdqn',
+    'Reinforce': '.on_policy.reinforce',
+    'A2C': '.on_policy.a2c',
+    'PPO': '.on_policy.ppo',
+    'TRPO': '.on_policy.trpo',
+    'VMPO': '.on_policy.v_mpo'
+})
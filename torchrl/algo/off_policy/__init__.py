@@ -1,9 +1,12 @@
-from .sac import SAC
-from .ddpg import DDPG
-from .twin_sac import TwinSAC
-from .twin_sac_q import TwinSACQ
-from .td3 import TD3
+from torchrl.utils.lazy import lazy_attrs
 
-from .dqn import DQN
-from .bootstrapped_dqn import BootstrappedDQN
-from .qrdqn import QRDQN
+__getattr__, __dir__ = lazy_attrs(__name__, {
+    'SAC': '.sac',
+    'DDPG': '.ddpg',
+    'TwinSAC': '.twin_sac',
+    'TwinSACQ': '.twin_sac_q',
+    'TD3': '.td3',
+    'DQN': '.dqn',
+    'BootstrappedDQN': '.bootstrapped_dqn',
+    'QRDQN': '.qrdqn'
+})
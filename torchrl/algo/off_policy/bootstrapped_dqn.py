@@ -2,6 +2,7 @@ import numpy as np
 import torch
 from torch import nn as nn
 from .dqn import DQN
+from torchrl.networks.base import obs_to_tensor
 
 
 class BootstrappedDQN(DQN):
@@ -15,7 +16,7 @@ class BootstrappedDQN(DQN):
         self.bernoulli_p = bernoulli_p
         self.head_num = head_num
 
-        self.sample_key = ["obs", "next_obs", "actions",
+        self.sample_key = ["obs", "next_obs", "acts",
                            "rewards", "terminals", "masks"]
 
     def take_actions(self, ob, action_func):
@@ -63,30 +64,29 @@ class BootstrappedDQN(DQN):
         terminals = batch['terminals']
         masks = batch['masks']
 
-        obs = torch.Tensor(obs).to(self.device)
-        actions = torch.Tensor(actions).to(self.device)
-        next_obs = torch.Tensor(next_obs).to(self.device)
-        rewards = torch.Tensor(rewards).to(self.device)
-        terminals = torch.Tensor(terminals).to(self.device)
-        masks = torch.Tensor(masks).to(self.device)
+        with self.profiler.span("h2d"):
+            obs = obs_to_tensor(obs, self.device)
+            actions = torch.Tensor(actions).to(self.device)
+            next_obs = obs_to_tensor(next_obs, self.device)
+            rewards = torch.Tensor(rewards).to(self.device)
+            terminals = torch.Tensor(terminals).to(self.device)
+            masks = torch.Tensor(masks).to(self.device)
 
-        mse_losses = []
+        # head_num x batch_size x action_num
         q_pred_all = self.qf(obs, range(self.head_num))
-        next_q_pred_all = self.target_qf(next_obs, range(self.head_num))
+        with torch.no_grad():
+            next_q_pred_all = self.target_qf(next_obs, range(self.head_num))
 
-        for i in range(self.head_num):
-            q_pred = q_pred_all[i]
-            q_s_a = q_pred.gather(1, actions.unsqueeze(1).long())
-            next_q_pred = next_q_pred_all[i]
+        actions = actions.long().view(1, -1, 1).expand(
+            self.head_num, -1, -1)
+        q_s_a = q_pred_all.gather(-1, actions)
 
-            target_q_s_a = rewards + self.discount * \
-                (1 - terminals) * next_q_pred.max(1, keepdim=True)[0]
-            # qf_loss = self.qf_criterion( q_s_a, target_q_s_a.detach())
-            assert q_s_a.shape == target_q_s_a.shape
-            mse_loss = (q_s_a - target_q_s_a) ** 2
-            mse_losses.append(mse_loss)
+        target_q_s_a = rewards + self.discount * \
+            (1 - terminals) * next_q_pred_all.max(-1, keepdim=True)[0]
+        assert q_s_a.shape == target_q_s_a.shape
 
-        mse_losses = torch.cat(mse_losses, dim=1)
+        # batch_size x head_num
+        mse_losses = ((q_s_a - target_q_s_a) ** 2).squeeze(-1).t()
         qf_loss = (mse_losses * masks / self.head_num).sum(1).mean()
 
         self.qf_optimizer.zero_grad()
@@ -4,6 +4,7 @@ import torch
 import torch.optim as optim
 from torch import nn as nn
 from .off_rl_algo import OffRLAlgo
+from torchrl.networks.base import obs_to_tensor
 
 
 class DQN(OffRLAlgo):
@@ -44,11 +45,12 @@ class DQN(OffRLAlgo):
         rewards = batch['rewards']
         terminals = batch['terminals']
 
-        rewards = torch.Tensor(rewards).to(self.device)
-        terminals = torch.Tensor(terminals).to(self.device)
-        obs = torch.Tensor(obs).to(self.device)
-        actions = torch.Tensor(actions).to(self.device)
-        next_obs = torch.Tensor(next_obs).to(self.device)
+        with self.profiler.span("h2d"):
+            rewards = torch.Tensor(rewards).to(self.device)
+            terminals = torch.Tensor(terminals).to(self.device)
+            obs = obs_to_tensor(obs, self.device)
+            actions = torch.Tensor(actions).to(self.device)
+            next_obs = obs_to_tensor(next_obs, self.device)
 
         q_pred = self.qf(obs)
         q_s_a = q_pred.gather(-1, actions.long())
@@ -3,6 +3,7 @@ import numpy as np
 import math
 import torch
 from torchrl.algo.rl_algo import RLAlgo
+import torchrl.utils.metrics as metrics
 
 
 class OffRLAlgo(RLAlgo):
@@ -37,16 +38,21 @@ class OffRLAlgo(RLAlgo):
     def update_per_timestep(self):
         if self.replay_buffer.num_steps_can_sample() > max(
                 self.min_pool, self.batch_size):
-            for _ in range(self.opt_times):
-                batch = self.replay_buffer.random_batch(
-                    self.batch_size, self.sample_key)
-                infos = self.update(batch)
-                self.logger.add_update_info(infos)
+            with self.profiler.span("update"), self.precision_scope():
+                for _ in range(self.opt_times):
+                    with self.profiler.span("batch_sample"):
+                        batch = self.replay_buffer.random_batch(
+                            self.batch_size, self.sample_key)
+                    self.sampled_bytes += metrics.nbytes(batch)
+                    infos = self.update(batch)
+                    self.logger.add_update_info(infos)
 
     def update_per_epoch(self):
         for _ in range(self.opt_times):
-            batch = self.replay_buffer.random_batch(
-                self.batch_size, self.sample_key)
+            with self.profiler.span("batch_sample"):
+                batch = self.replay_buffer.random_batch(
+                    self.batch_size, self.sample_key)
+            self.sampled_bytes += metrics.nbytes(batch)
             infos = self.update(batch)
             self.logger.add_update_info(infos)
 
@@ -61,7 +67,8 @@ class OffRLAlgo(RLAlgo):
 
             self.start_epoch()
 
-            training_epoch_info = self.collector.train_one_epoch()
+            with self.profiler.span("collect"):
+                training_epoch_info = self.collector.train_one_epoch()
             for reward in training_epoch_info["train_rewards"]:
                 self.training_episode_rewards.append(reward)
 
@@ -6,6 +6,7 @@ from torch import nn as nn
 
 import torchrl.algo.utils as atu
 from .dqn import DQN
+from torchrl.networks.base import obs_to_tensor
 
 
 class QRDQN(DQN):
@@ -28,19 +29,20 @@ class QRDQN(DQN):
         rewards = batch['rewards']
         terminals = batch['terminals']
 
-        rewards = torch.Tensor(rewards).to(self.device)
-        terminals = torch.Tensor(terminals).to(self.device)
-        obs = torch.Tensor(obs).to(self.device)
-        actions = torch.Tensor(actions).to(self.device)
-        next_obs = torch.Tensor(next_obs).to(self.device)
+        with self.profiler.span("h2d"):
+            rewards = torch.Tensor(rewards).to(self.device)
+            terminals = torch.Tensor(terminals).to(self.device)
+            obs = obs_to_tensor(obs, self.device)
+            actions = torch.Tensor(actions).to(self.device)
+            next_obs = obs_to_tensor(next_obs, self.device)
 
         batch_size = obs.shape[0]
 
         q_pred = self.qf(obs)
         q_pred = q_pred.view(batch_size, -1, self.quantile_num)
         q_s_a = q_pred.gather(
-            1, actions.unsqueeze(1).unsqueeze(2).repeat(
-                [1, 1, self.quantile_num]).long())
+            1, actions.long().view(-1, 1, 1).expand(
+                -1, 1, self.quantile_num))
         q_s_a = q_s_a.squeeze(1)
 
         next_q_pred = self.target_qf(next_obs)
@@ -51,8 +53,8 @@ class QRDQN(DQN):
 
         target_q_s_a = rewards + self.discount * \
             (1 - terminals) * next_q_pred.gather(
-                1, target_action.unsqueeze(2).repeat(
-                    [1, 1, self.quantile_num])).squeeze(1)
+                1, target_action.view(-1, 1, 1).expand(
+                    -1, 1, self.quantile_num)).squeeze(1)
 
         qf_loss = self.qf_criterion(
             self.quantile_coefficient,
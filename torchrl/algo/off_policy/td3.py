@@ -63,11 +63,12 @@ class TD3(OffRLAlgo):
         rewards = batch['rewards']
         terminals = batch['terminals']
 
-        obs = torch.Tensor(obs).to(self.device)
-        actions = torch.Tensor(actions).to(self.device)
-        next_obs = torch.Tensor(next_obs).to(self.device)
-        rewards = torch.Tensor(rewards).to(self.device)
-        terminals = torch.Tensor(terminals).to(self.device)
+        with self.profiler.span("h2d"):
+            obs = torch.Tensor(obs).to(self.device)
+            actions = torch.Tensor(actions).to(self.device)
+            next_obs = torch.Tensor(next_obs).to(self.device)
+            rewards = torch.Tensor(rewards).to(self.device)
+            terminals = torch.Tensor(terminals).to(self.device)
 
         """
         QF Loss
@@ -87,11 +87,12 @@ class TwinSAC(OffRLAlgo):
         rewards = batch['rewards']
         terminals = batch['terminals']
 
-        rewards = torch.Tensor(rewards).to(self.device)
-        terminals = torch.Tensor(terminals).to(self.device)
-        obs = torch.Tensor(obs).to(self.device)
-        actions = torch.Tensor(actions).to(self.device)
-        next_obs = torch.Tensor(next_obs).to(self.device)
+        with self.profiler.span("h2d"):
+            rewards = torch.Tensor(rewards).to(self.device)
+            terminals = torch.Tensor(terminals).to(self.device)
+            obs = torch.Tensor(obs).to(self.device)
+            actions = torch.Tensor(actions).to(self.device)
+            next_obs = torch.Tensor(next_obs).to(self.device)
 
         """
         Policy operations.
@@ -1,5 +1,9 @@
-from .reinforce import Reinforce
-from .a2c import A2C
-from .ppo import PPO
-from .trpo import TRPO
-from .v_mpo import VMPO
\ No newline at end of file
+from torchrl.utils.lazy import lazy_attrs
+
+__getattr__, __dir__ = lazy_attrs(__name__, {
+    'Reinforce': '.reinforce',
+    'A2C': '.a2c',
+    'PPO': '.ppo',
+    'TRPO': '.trpo',
+    'VMPO': '.v_mpo'
+})
@@ -3,6 +3,7 @@ import torch
 import torch.optim as optim
 import torch.nn as nn
 from .on_rl_algo import OnRLAlgo
+from torchrl.networks.base import obs_to_tensor
 
 
 class A2C(OnRLAlgo):
@@ -52,10 +53,11 @@ class A2C(OnRLAlgo):
         advs = batch['advs']
         est_rets = batch['estimate_returns']
 
-        obs = torch.Tensor(obs).to(self.device)
-        acts = torch.Tensor(acts).to(self.device)
-        advs = torch.Tensor(advs).to(self.device)
-        est_rets = torch.Tensor(est_rets).to(self.device)
+        with self.profiler.span("h2d"):
+            obs = obs_to_tensor(obs, self.device)
+            acts = torch.Tensor(acts).to(self.device)
+            advs = torch.Tensor(advs).to(self.device)
+            est_rets = torch.Tensor(est_rets).to(self.device)
 
         out = self.pf.update(obs, acts)
         log_probs = out['log_prob']
@@ -1,6 +1,8 @@
 import numpy as np
 import torch
 from torchrl.algo.rl_algo import RLAlgo
+import torchrl.utils.metrics as metrics
+from torchrl.networks.base import obs_to_tensor
 
 
 class OnRLAlgo(RLAlgo):
@@ -22,20 +24,21 @@ class OnRLAlgo(RLAlgo):
     def process_epoch_samples(self):
         sample = self.replay_buffer.last_sample(
             ['next_obs', 'terminals', "time_limits"])
-        last_ob = torch.Tensor(sample['next_obs']).to(self.device)
+        last_ob = obs_to_tensor(sample['next_obs'], self.device)
         last_value = self.vf(last_ob).detach().cpu().numpy()
         last_value = last_value * (1 - sample["terminals"])
-        if self.gae:
-            self.replay_buffer.generalized_advantage_estimation(last_value,
-                                                                self.discount,
-                                                                self.tau)
-        else:
-            self.replay_buffer.discount_reward(last_value, self.discount)
+        with self.profiler.span("advantage_estimation"):
+            if self.gae:
+                self.replay_buffer.generalized_advantage_estimation(
+                    last_value, self.discount, self.tau)
+            else:
+                self.replay_buffer.discount_reward(last_value, self.discount)
 
     def update_per_epoch(self):
         self.process_epoch_samples()
         for batch in self.replay_buffer.one_iteration(
                         self.batch_size, self.sample_key, self.shuffle):
+            self.sampled_bytes += metrics.nbytes(batch)
             infos = self.update(batch)
             self.logger.add_update_info(infos)
 
@@ -5,6 +5,8 @@ import torch.optim as optim
 import torch.nn as nn
 from .a2c import A2C
 import torchrl.algo.utils as atu
+import torchrl.utils.metrics as metrics
+from torchrl.networks.base import obs_to_tensor
 
 
 class PPO(A2C):
@@ -35,6 +37,7 @@ class PPO(A2C):
             for batch in self.replay_buffer.one_iteration(self.batch_size,
                                                           self.sample_key,
                                                           self.shuffle):
+                self.sampled_bytes += metrics.nbytes(batch)
                 infos = self.update(batch)
                 self.logger.add_update_info(infos)
 
@@ -132,11 +135,12 @@ class PPO(A2C):
         old_values = batch['values']
         est_rets = batch['estimate_returns']
 
-        obs = torch.Tensor(obs).to(self.device)
-        actions = torch.Tensor(actions).to(self.device)
-        advs = torch.Tensor(advs).to(self.device)
-        old_values = torch.Tensor(old_values).to(self.device)
-        est_rets = torch.Tensor(est_rets).to(self.device)
+        with self.profiler.span("h2d"):
+            obs = obs_to_tensor(obs, self.device)
+            actions = torch.Tensor(actions).to(self.device)
+            advs = torch.Tensor(advs).to(self.device)
+            old_values = torch.Tensor(old_values).to(self.device)
+            est_rets = torch.Tensor(est_rets).to(self.device)
 
         info['advs/mean'] = advs.mean().item()
         info['advs/std'] = advs.std().item()
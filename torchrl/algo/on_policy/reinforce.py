@@ -2,6 +2,7 @@ import torch
 import torch.optim as optim
 from .on_rl_algo import OnRLAlgo
 from torchrl.networks.nets import ZeroNet
+from torchrl.networks.base import obs_to_tensor
 
 
 class Reinforce(OnRLAlgo):
@@ -44,9 +45,10 @@ class Reinforce(OnRLAlgo):
         info['advs/max'] = advs.max().item()
         info['advs/min'] = advs.min().item()
 
-        obs = torch.Tensor(obs).to(self.device)
-        acts = torch.Tensor(acts).to(self.device)
-        advs = torch.Tensor(advs).to(self.device)
+        with self.profiler.span("h2d"):
+            obs = obs_to_tensor(obs, self.device)
+            acts = torch.Tensor(acts).to(self.device)
+            advs = torch.Tensor(advs).to(self.device)
 
         out = self.pf.update(obs, acts)
         log_probs = out['log_prob']
@@ -1,22 +1,32 @@
-import copy
 import torch
-import torch.nn.functional as F
 from torch.distributions import Categorical
 from torch.distributions import Normal
+from torch.func import functional_call, grad, jvp
 from torch.nn.utils.convert_parameters import vector_to_parameters
 from torch.nn.utils.convert_parameters import parameters_to_vector
 import numpy as np
 from .a2c import A2C
 import torchrl.algo.utils as atu
+import torchrl.utils.metrics as metrics
+from torchrl.policies.distribution import TanhNormal
+from torchrl.networks.base import obs_to_tensor
 
 
 class TRPO(A2C):
     """
     TRPO
+    Fisher-vector products are computed with forward-over-reverse
+    torch.func calls on a subsampled batch, the old distribution is
+    cached once per update and line search candidates are evaluated
+    with functional parameters
     """
     def __init__(
             self, max_kl, cg_damping, v_opt_times,
-            cg_iters, residual_tol, **kwargs):
+            cg_iters, residual_tol,
+            fisher_sample_ratio=0.2,
+            max_backtracks=10,
+            accept_ratio=0.1,
+            **kwargs):
         super().__init__(**kwargs)
 
         self.max_kl = max_kl
@@ -24,66 +34,74 @@ class TRPO(A2C):
         self.cg_iters = cg_iters
         self.residual_tol = residual_tol
         self.v_opt_times = v_opt_times
+        self.fisher_sample_ratio = fisher_sample_ratio
+        self.max_backtracks = max_backtracks
+        self.accept_ratio = accept_ratio
         self.vf_sample_key = ["obs", "estimate_returns"]
 
-    def mean_kl_divergence(self, model):
+    def _dist_params(self, output):
         """
-        Returns an estimate of the average KL divergence
-        between a given model and self.policy_model
+        Tensors describing the action distribution given pf.forward output
         """
-        def normal_distribution_kl_divergence(mean_old, std_old,
-                                              mean_new, std_new):
-            return torch.mean(torch.sum(
-                    (torch.log(std_new) - torch.log(std_old) +
-                        (std_old * std_old + (mean_old - mean_new).pow(2)) /
-                        (2.0 * std_new * std_new) - 0.5), 1))
-
-        output_new = model.update(self.obs, self.acts)
-        output_old = self.pf.update(self.obs, self.acts)
-
         if self.continuous:
-            mean_new, std_new = output_new["mean"], output_new["std"]
-            mean_old, std_old = output_old["mean"], output_old["std"]
-
-            mean_new = mean_new.detach()
-            std_new = std_new.detach()
-
-            kl = normal_distribution_kl_divergence(
-                mean_old, std_old, mean_new, std_new)
-        else:
-            probs_new = output_new["dis"]
-            probs_old = output_old["dis"]
-
-            probs_new = probs_new.detach()
-
-            kl = torch.sum(
-                    probs_old * torch.log(
-                        probs_old / (probs_new + 1e-8)), 1).mean()
+            mean, std, _ = output
+            return mean, std
+        return (output,)
 
-        return kl
+    def _log_probs(self, output, actions):
+        if self.continuous:
+            mean, std, _ = output
+            if self.pf.tanh_action:
+                dis = TanhNormal(mean, std)
+            else:
+                dis = Normal(mean, std)
+            return dis.log_prob(actions).sum(-1, keepdim=True)
+        return Categorical(output).log_prob(actions).unsqueeze(-1)
 
-    def hessian_vector_product(self, vector):
+    def kl_divergence(self, dist_old, dist_new):
+        """
+        Mean KL(old || new)
+        """
+        if self.continuous:
+            mean_old, std_old = dist_old
+            mean_new, std_new = dist_new
+            kl = torch.log(std_new) - torch.log(std_old) + \
+                (std_old * std_old + (mean_old - mean_new).pow(2)) / \
+                (2.0 * std_new * std_new) - 0.5
+            return kl.sum(-1).mean()
+
+        probs_old, = dist_old
+        probs_new, = dist_new
+        return torch.sum(
+            probs_old * torch.log(probs_old / (probs_new + 1e-8)),
+            -1).mean()
+
+    def _flatten(self, params):
+        return torch.cat(
+            [params[name].reshape(-1) for name, _ in self.pf.named_parameters()])
+
+    def _unflatten(self, vector):
+        params = {}
+        offset = 0
+        for name, param in self.pf.named_parameters():
+            numel = param.numel()
+            params[name] = vector[offset: offset + numel].view_as(param)
+            offset += numel
+        return params
+
+    def fisher_vector_product(self, vector):
         """
         Returns the product of the Hessian of
-        the KL divergence and the given vector
+        the KL divergence (on the Fisher batch) and the given vector
         """
-        self.pf.zero_grad()
-        mean_kl_div = self.mean_kl_divergence(self.pf)
-
-        kl_grad_vector = torch.autograd.grad(
-            mean_kl_div, self.pf.parameters(), create_graph=True)
+        def fisher_kl(params):
+            output = functional_call(self.pf, params, (self.fisher_obs,))
+            return self.kl_divergence(
+                self.fisher_dist_old, self._dist_params(output))
 
-        kl_grad_vector = torch.cat(
-            [grad.view(-1) for grad in kl_grad_vector])
-        grad_vector_product = torch.sum(kl_grad_vector * vector)
-
-        second_order_grad = torch.autograd.grad(
-            grad_vector_product, self.pf.parameters())
-
-        fisher_vector_product = torch.cat(
-            [grad.contiguous().view(-1) for grad in second_order_grad])
-
-        return fisher_vector_product + self.cg_damping * vector.detach()
+        _, product = jvp(
+            grad(fisher_kl), (self.params,), (self._unflatten(vector),))
+        return self._flatten(product) + self.cg_damping * vector
 
     def conjugate_gradient(self, b):
         """
@@ -91,11 +109,11 @@ class TRPO(A2C):
         """
         p = b.clone()
         r = b.clone()
-        x = torch.zeros_like(p).to(self.device)
+        x = torch.zeros_like(p)
         rdotr = r.double().dot(r.double())
 
         for _ in range(self.cg_iters):
-            z = self.hessian_vector_product(p).squeeze(0)
+            z = self.fisher_vector_product(p)
             v = (rdotr / p.double().dot(z.double())).float()
 
             x += v * p
@@ -114,29 +132,22 @@ class TRPO(A2C):
         """
         Returns the surrogate loss w.r.t. the given parameter vector theta
         """
-        theta = theta.detach()
-        new_model = copy.deepcopy(self.pf)
-        vector_to_parameters(theta, new_model.parameters())
-
-        output_new = new_model.update(self.obs, self.acts)
-        output_old = self.pf.update(self.obs, self.acts)
-
-        log_probs_new = output_new["log_prob"].detach()
-        log_probs_old = output_old["log_prob"]
-
-        ratio = torch.exp(log_probs_new - log_probs_old).detach()
-
-        return -torch.mean(ratio * self.advs)
+        with torch.no_grad():
+            output = functional_call(
+                self.pf, self._unflatten(theta), (self.obs,))
+            log_probs = self._log_probs(output, self.acts)
+            ratio = torch.exp(log_probs - self.log_probs_old)
+            return -torch.mean(ratio * self.advs)
 
     def linesearch(self, x, fullstep, expected_improve_rate):
         """
         Returns the parameter vector given by a linesearch
+        and the number of steps searched (0 if no step is accepted and
+        x is returned)
         """
-        accept_ratio = .1
-        max_backtracks = 10
         fval = self.surrogate_loss(x)
-        for n_backtrack, stepfrac in enumerate(.5**np.arange(max_backtracks)):
-            print("Search number {}...".format(n_backtrack + 1))
+        for n_backtrack, stepfrac in enumerate(
+                .5**np.arange(self.max_backtracks)):
             stepfrac = float(stepfrac)
             xnew = x + stepfrac * fullstep
             newfval = self.surrogate_loss(xnew)
@@ -146,9 +157,9 @@ class TRPO(A2C):
 
             ratio = actual_improve / expected_improve
 
-            if ratio > accept_ratio and actual_improve > 0:
-                return xnew
-        return x.detach()
+            if ratio > self.accept_ratio and actual_improve > 0:
+                return xnew, n_backtrack + 1
+        return x, 0
 
     def update(self, batch):
         self.training_update_num += 1
@@ -159,9 +170,10 @@ class TRPO(A2C):
         self.acts = batch['acts']
         self.advs = batch['advs']
 
-        self.obs = torch.Tensor(self.obs).to(self.device)
-        self.acts = torch.Tensor(self.acts).to(self.device)
-        self.advs = torch.Tensor(self.advs).to(self.device)
+        with self.profiler.span("h2d"):
+            self.obs = obs_to_tensor(self.obs, self.device)
+            self.acts = torch.Tensor(self.acts).to(self.device)
+            self.advs = torch.Tensor(self.advs).to(self.device)
 
         info['advs/mean'] = self.advs.mean().item()
         info['advs/std'] = self.advs.std().item()
@@ -174,10 +186,24 @@ class TRPO(A2C):
         log_probs = out['log_prob']
         ent = out['ent']
 
-        probs_new = torch.exp(log_probs)
-        probs_old = probs_new.detach() + 1e-8
+        # Cache old distribution & log probs for KL / line search
+        self.log_probs_old = log_probs.detach()
+        with torch.no_grad():
+            dist_old = self._dist_params(self.pf(self.obs))
+
+        sample_num = self.obs.shape[0]
+        fisher_num = max(int(sample_num * self.fisher_sample_ratio), 1)
+        if fisher_num < sample_num:
+            fisher_idx = torch.randperm(
+                sample_num, device=self.obs.device)[:fisher_num]
+            self.fisher_obs = self.obs[fisher_idx]
+            self.fisher_dist_old = tuple(
+                dist[fisher_idx] for dist in dist_old)
+        else:
+            self.fisher_obs = self.obs
+            self.fisher_dist_old = dist_old
 
-        ratio = probs_new / probs_old
+        ratio = torch.exp(log_probs - self.log_probs_old)
 
         surrogate_loss = - torch.mean(ratio * self.advs) - \
             self.entropy_coeff * ent.mean()
@@ -186,42 +212,47 @@ class TRPO(A2C):
         self.pf.zero_grad()
         surrogate_loss.backward()
         policy_gradient = parameters_to_vector(
-            [p.grad for p in self.pf.parameters()]).squeeze(0).detach()
+            [p.grad for p in self.pf.parameters()]).detach()
+        self.pf.zero_grad()
+
+        self.params = {
+            name: param.detach()
+            for name, param in self.pf.named_parameters()}
 
         # ensure gradient is not zero
-        if policy_gradient.nonzero().size()[0]:
+        if torch.any(policy_gradient != 0):
             # Use Conjugate gradient to calculate step direction
             step_direction = self.conjugate_gradient(-policy_gradient)
             # line search for step
             shs = .5 * step_direction.dot(
-                self.hessian_vector_product(step_direction))
+                self.fisher_vector_product(step_direction))
 
             lm = torch.sqrt(shs / self.max_kl)
             fullstep = step_direction / lm
 
             gdotstepdir = -policy_gradient.dot(step_direction)
-            theta = self.linesearch(parameters_to_vector(
-                    self.pf.parameters()).detach(),
-                    fullstep, gdotstepdir / lm)
-            # Update parameters of policy model
-            old_model = copy.deepcopy(self.pf)
-            old_model.load_state_dict(self.pf.state_dict())
-
-            if any(np.isnan(theta.cpu().detach().numpy())):
-                print("NaN detected. Skipping update...")
+            theta, search_steps = self.linesearch(
+                self._flatten(self.params), fullstep, gdotstepdir / lm)
+
+            if torch.isnan(theta).any():
+                info['Training/nan_skipped'] = 1
             else:
                 vector_to_parameters(theta, self.pf.parameters())
+                info['Training/nan_skipped'] = 0
 
-            kl_old_new = self.mean_kl_divergence(old_model)
-            print('KL:{:10} , Entropy:{:10}'.format(
-                kl_old_new.item(), ent.mean().item()))
+            with torch.no_grad():
+                kl_old_new = self.kl_divergence(
+                    dist_old, self._dist_params(self.pf(self.obs)))
+            info['Training/kl'] = kl_old_new.item()
+            info['Training/linesearch_steps'] = search_steps
         else:
-            print("Policy gradient is 0. Skipping update...")
-            print(policy_gradient.shape)
-
-        self.pf.zero_grad()
+            # same keys every update, csv columns stay fixed
+            info['Training/nan_skipped'] = 0
+            info['Training/kl'] = 0
+            info['Training/linesearch_steps'] = 0
 
         info['Training/policy_loss'] = surrogate_loss.item()
+        info['Training/ent'] = ent.mean().item()
 
         info['logprob/mean'] = log_probs.mean().item()
         info['logprob/std'] = log_probs.std().item()
@@ -236,8 +267,9 @@ class TRPO(A2C):
         obs = batch['obs']
         est_rets = batch['estimate_returns']
 
-        obs = torch.Tensor(obs).to(self.device)
-        est_rets = torch.Tensor(est_rets).to(self.device)
+        with self.profiler.span("h2d"):
+            obs = obs_to_tensor(obs, self.device)
+            est_rets = torch.Tensor(est_rets).to(self.device)
 
         values = self.vf(obs)
         assert values.shape == est_rets.shape, \
@@ -262,12 +294,11 @@ class TRPO(A2C):
             self.pf_optimizer, self.current_epoch, self.num_epochs, self.plr)
         atu.update_linear_schedule(
             self.vf_optimizer, self.current_epoch, self.num_epochs, self.vlr)
-        whole_batch = {
-            "obs": self.replay_buffer._obs.copy(),
-            "acts": self.replay_buffer._acts.copy(),
-            "advs": self.replay_buffer._advs.copy(),
-            "estimate_returns": self.replay_buffer._estimate_returns.copy()
-        }
+        # flatten (time, env) dimensions, no copy needed
+        whole_batch = {}
+        for key in ["obs", "acts", "advs", "estimate_returns"]:
+            data = self.replay_buffer.__getattribute__("_" + key)
+            whole_batch[key] = data.reshape((-1,) + data.shape[2:])
         infos = self.update(whole_batch)
         self.logger.add_update_info(infos)
 
@@ -275,6 +306,7 @@ class TRPO(A2C):
             for batch in self.replay_buffer.one_iteration(self.batch_size,
                                                           self.vf_sample_key,
                                                           self.shuffle):
+                self.sampled_bytes += metrics.nbytes(batch)
                 infos = self.update_vf(batch)
                 self.logger.add_update_info(infos)
 
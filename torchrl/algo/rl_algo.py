@@ -1,9 +1,16 @@
 import copy
+import random
 import time
+import contextlib
 from collections import deque
 import numpy as np
 import torch
 import torchrl.algo.utils as atu
+import torchrl.policies as policies
+import torchrl.networks as networks
+from torchrl.utils.profiler import Profiler
+from torchrl.utils.checkpoint import CheckpointWriter
+import torchrl.utils.metrics as metrics
 import gym
 import os
 import os.path as osp
@@ -28,7 +35,17 @@ class RLAlgo():
             device='cpu',
             save_interval=100,
             eval_interval=1,
-            save_dir=None):
+            save_dir=None,
+            export_actor=False,
+            quantize_actor=False,
+            use_exported_for_eval=False,
+            precision="fp32",
+            profile=False,
+            profile_cuda_sync=False,
+            async_checkpoint=True,
+            keep_last_checkpoints=None,
+            checkpoint_interval=None,
+            checkpoint_buffer=False):
 
         self.env = env
 
@@ -50,6 +67,14 @@ class RLAlgo():
         self.sample_key = None
         self.grad_clip = grad_clip
 
+        # bf16 autocast for network forwards during updates,
+        # parameters / optimizer states stay in fp32 and bf16 shares the
+        # fp32 exponent range, so no loss scaling is needed
+        assert precision in ["fp32", "bf16"], \
+            "precision should be fp32 or bf16"
+        self.precision = precision
+        self.autocast_dtype = torch.bfloat16 if precision == "bf16" else None
+
         # Logger & relevant setting
         self.logger = logger
 
@@ -58,8 +83,24 @@ class RLAlgo():
 
         self.save_interval = save_interval
         self.save_dir = save_dir
+        # export frozen actor for rollout / evaluation workers
+        self.export_actor = export_actor
+        self.quantize_actor = quantize_actor
+        # evaluate with the exported actor instead of the live pf,
+        # it is re-exported from the current pf before every evaluation
+        self.use_exported_for_eval = use_exported_for_eval
 
         pathlib.Path(self.save_dir).mkdir(parents=True, exist_ok=True)
+        # snapshots are copied to cpu memory and written in background
+        self.checkpoint_writer = CheckpointWriter(
+            keep_last=keep_last_checkpoints, async_write=async_checkpoint)
+        # full training state for resuming, written as checkpoint_latest.pth
+        self.checkpoint_interval = checkpoint_interval \
+            if checkpoint_interval is not None else save_interval
+        self.checkpoint_buffer = checkpoint_buffer
+        self.start_epoch_num = 0
+        self.total_frames = 0
+        self.buffer_restored = False
 
         self.best_eval = None
         self.eval_interval = eval_interval
@@ -68,6 +109,29 @@ class RLAlgo():
         self.train_time = 0
         self.start = time.time()
 
+        # throughput counters, reset every time perf infos are logged
+        self.sampled_bytes = 0
+        self._last_update_num = 0
+        self._last_total_frames = 0
+
+        # per-phase timing, near zero overhead when disabled
+        self.profiler = Profiler(enabled=profile, cuda_sync=profile_cuda_sync)
+        self.collector.profiler = self.profiler
+
+    def setup_profiler(self):
+        """
+        Attach forward hooks / optimizer timers,
+        networks and optimizers are created by subclasses
+        """
+        if not self.profiler.enabled:
+            return
+        for name, value in list(vars(self).items()):
+            if isinstance(value, torch.nn.Module):
+                self.profiler.attach_module(value, name)
+            elif isinstance(value, torch.optim.Optimizer):
+                self.profiler.instrument_optimizer(
+                    value, name.replace("_optimizer", ""))
+
     def start_epoch(self):
         pass
 
@@ -81,50 +145,210 @@ class RLAlgo():
         pass
 
     def snapshot(self, prefix, epoch):
+        files = {}
         if hasattr(self.env, "_obs_normalizer") and \
             self.env._obs_normalizer is not None:
             normalizer_file_name = "_obs_normalizer_{}.pkl".format(epoch)
             normalizer_path = osp.join(prefix, normalizer_file_name)
-            with open(normalizer_path, "wb") as f:
-                pickle.dump(self.env._obs_normalizer, f)
+            files["_obs_normalizer"] = (
+                normalizer_path, copy.deepcopy(self.env._obs_normalizer))
 
         for name, network in self.snapshot_networks:
             model_file_name = "model_{}_{}.pth".format(name, epoch)
             model_path = osp.join(prefix, model_file_name)
-            torch.save(network.state_dict(), model_path)
+            files["model_" + name] = (model_path, network.state_dict())
+
+        if self.export_actor:
+            actor_file_name = "actor_{}.pt".format(epoch)
+            actor_path = osp.join(prefix, actor_file_name)
+            # tracing / freezing runs on the writer thread with a copy
+            # of the current policy
+            pf = copy.deepcopy(self.pf)
+            input_shape = self.env.observation_space.shape
+            quantize = self.quantize_actor
+            files["actor"] = (actor_path, lambda path: policies.export_actor(
+                pf, input_shape, path, quantize=quantize))
+
+        self.checkpoint_writer.save(epoch, files)
+
+    def state_dict(self):
+        """
+        Everything needed to resume training exactly: networks, optimizers,
+        trainable tensors (log_alpha...), exploration schedules, counters,
+        env wrapper statistics and RNG states
+        """
+        state = {
+            "networks": {},
+            "optimizers": {},
+            "tensors": {},
+            "epoch": self.current_epoch,
+            "total_frames": self.total_frames,
+            "training_update_num": self.training_update_num,
+            "best_eval": self.best_eval,
+            "episode_rewards": list(self.episode_rewards),
+            "training_episode_rewards": list(self.training_episode_rewards),
+            "collector": self.collector.state_dict(),
+            "rng": {
+                "random": random.getstate(),
+                "numpy": np.random.get_state(),
+                "torch": torch.get_rng_state(),
+                "cuda": torch.cuda.get_rng_state_all()
+                if torch.cuda.is_available() else None
+            }
+        }
+        for name, value in vars(self).items():
+            if isinstance(value, torch.nn.Module):
+                state["networks"][name] = value.state_dict()
+            elif isinstance(value, torch.optim.Optimizer):
+                state["optimizers"][name] = value.state_dict()
+            elif isinstance(value, torch.Tensor) and value.requires_grad:
+                state["tensors"][name] = value
+        # policy wrappers which are not modules (epsilon greedy...)
+        if not isinstance(self.pf, torch.nn.Module) and \
+                hasattr(self.pf, "state_dict"):
+            state["policy"] = self.pf.state_dict()
+        return state
+
+    def load_state_dict(self, state):
+        for name, net_state in state["networks"].items():
+            getattr(self, name).load_state_dict(net_state)
+        for name, opt_state in state["optimizers"].items():
+            getattr(self, name).load_state_dict(opt_state)
+        with torch.no_grad():
+            for name, tensor in state["tensors"].items():
+                getattr(self, name).copy_(tensor)
+        if "policy" in state:
+            self.pf.load_state_dict(state["policy"])
+
+        self.start_epoch_num = state["epoch"] + 1
+        self.current_epoch = state["epoch"]
+        self.total_frames = state["total_frames"]
+        self.training_update_num = state["training_update_num"]
+        self.best_eval = state["best_eval"]
+        self.episode_rewards.extend(state["episode_rewards"])
+        self.training_episode_rewards.extend(
+            state["training_episode_rewards"])
+        self.collector.load_state_dict(state["collector"])
+
+        random.setstate(state["rng"]["random"])
+        np.random.set_state(state["rng"]["numpy"])
+        torch.set_rng_state(state["rng"]["torch"])
+        if state["rng"]["cuda"] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(state["rng"]["cuda"])
+
+    def save_checkpoint(self, prefix):
+        files = {
+            "checkpoint": (
+                osp.join(prefix, "checkpoint_latest.pth"), self.state_dict())
+        }
+        if self.checkpoint_buffer:
+            # the buffer arrays are copied on the training thread (the
+            # buffer keeps changing while the writer pickles the copy),
+            # which costs a full buffer copy of time and memory per
+            # checkpoint, the copy is freed once written
+            files["replay_buffer"] = (
+                osp.join(prefix, "replay_buffer_latest.pkl"),
+                self.replay_buffer.state_dict())
+        self.checkpoint_writer.save("latest", files)
+
+    def load_checkpoint(self, prefix):
+        """
+        Resume from checkpoint_latest.pth (and replay_buffer_latest.pkl
+        if saved) in prefix, training continues from the next epoch
+        """
+        state = torch.load(
+            osp.join(prefix, "checkpoint_latest.pth"),
+            map_location=self.device, weights_only=False)
+        self.load_state_dict(state)
+        if self.logger is not None:
+            self.logger.truncate(state["epoch"])
+        buffer_path = osp.join(prefix, "replay_buffer_latest.pkl")
+        if osp.exists(buffer_path):
+            with open(buffer_path, "rb") as f:
+                self.replay_buffer.load_state_dict(pickle.load(f))
+            self.buffer_restored = True
+
+    def perf_infos(self, total_frames):
+        """
+        Throughput / resource usage since last call
+        """
+        infos = {}
+        # agent steps, every agent step covers action_repeat env frames
+        infos["Perf/frames_per_sec"] = \
+            (total_frames - self._last_total_frames) / \
+            max(self.explore_time, 1e-8)
+        infos["Perf/env_frames_per_sec"] = infos["Perf/frames_per_sec"] * \
+            getattr(self.collector, "action_repeat", 1)
+        infos["Perf/updates_per_sec"] = \
+            (self.training_update_num - self._last_update_num) / \
+            max(self.train_time, 1e-8)
+        infos["Perf/sampled_mb_per_sec"] = \
+            self.sampled_bytes / 2 ** 20 / max(self.train_time, 1e-8)
+        infos["Perf/buffer_fill"] = self.replay_buffer.fill_ratio()
+        infos["Perf/buffer_mb"] = \
+            self.replay_buffer.memory_footprint() / 2 ** 20
+        rss = metrics.get_rss()
+        if rss is not None:
+            infos["Perf/rss_mb"] = rss / 2 ** 20
+        for key, value in self.collector.stats().items():
+            infos["Perf/" + key] = value
+
+        self.sampled_bytes = 0
+        self._last_update_num = self.training_update_num
+        self._last_total_frames = total_frames
+        return infos
 
     def train(self):
-        self.pretrain()
-        total_frames = 0
-        if hasattr(self, "pretrain_frames"):
+        self.setup_profiler()
+        resumed = self.start_epoch_num > 0
+        # refill replay buffer if it was not restored
+        if not resumed or not self.buffer_restored:
+            self.pretrain()
+        total_frames = self.total_frames
+        if not resumed and hasattr(self, "pretrain_frames"):
             total_frames = self.pretrain_frames
+        self._last_total_frames = total_frames
 
         self.start_epoch()
 
-        for epoch in range(self.num_epochs):
+        for epoch in range(self.start_epoch_num, self.num_epochs):
             self.current_epoch = epoch
             start = time.time()
 
             self.start_epoch()
 
             explore_start_time = time.time()
-            training_epoch_info = self.collector.train_one_epoch()
+            with self.profiler.span("collect"):
+                training_epoch_info = self.collector.train_one_epoch()
             for reward in training_epoch_info["train_rewards"]:
                 self.training_episode_rewards.append(reward)
 
             self.explore_time += time.time() - explore_start_time
 
             train_start_time = time.time()
-            self.update_per_epoch()
+            with self.profiler.span("update"), self.precision_scope():
+                self.update_per_epoch()
             self.train_time += time.time() - train_start_time
 
             finish_epoch_info = self.finish_epoch()
 
             total_frames += self.epoch_frames
+            self.total_frames = total_frames
 
             if epoch % self.eval_interval == 0:
+                export_time = None
+                if self.use_exported_for_eval:
+                    export_start_time = time.time()
+                    with self.profiler.span("export"):
+                        self.collector.eval_pf = policies.InferenceActor(
+                            policies.export_actor(
+                                self.pf, self.env.observation_space.shape,
+                                None, quantize=self.quantize_actor))
+                    export_time = time.time() - export_start_time
+
                 eval_start_time = time.time()
-                eval_infos = self.collector.eval_one_epoch()
+                with self.profiler.span("eval"):
+                    eval_infos = self.collector.eval_one_epoch()
                 eval_time = time.time() - eval_start_time
 
                 infos = {}
@@ -135,7 +359,8 @@ class RLAlgo():
                 if self.best_eval is None or \
                     (np.mean(eval_infos["eval_rewards"]) > self.best_eval):
                     self.best_eval = np.mean(eval_infos["eval_rewards"])
-                    self.snapshot(self.save_dir, 'best')
+                    with self.profiler.span("snapshot"):
+                        self.snapshot(self.save_dir, 'best')
                 del eval_infos["eval_rewards"]
 
                 infos["Running_Average_Rewards"] = np.mean(
@@ -144,35 +369,68 @@ class RLAlgo():
                     training_epoch_info["train_epoch_reward"]
                 infos["Running_Training_Average_Rewards"] = np.mean(
                     self.training_episode_rewards)
+                infos.update(self.perf_infos(total_frames))
                 infos["Explore_Time"] = self.explore_time
                 infos["Train___Time"] = self.train_time
                 infos["Eval____Time"] = eval_time
+                if export_time is not None:
+                    infos["Perf/actor_export_time"] = export_time
                 self.explore_time = 0
                 self.train_time = 0
                 infos.update(eval_infos)
                 infos.update(finish_epoch_info)
+                infos.update(self.profiler.epoch_infos())
 
-                self.logger.add_epoch_info(
-                    epoch, total_frames, time.time() - self.start, infos)
+                with self.profiler.span("logging"):
+                    self.logger.add_epoch_info(
+                        epoch, total_frames, time.time() - self.start, infos)
                 self.start = time.time()
 
             if epoch % self.save_interval == 0:
-                self.snapshot(self.save_dir, epoch)
+                with self.profiler.span("snapshot"):
+                    self.snapshot(self.save_dir, epoch)
+
+            if epoch % self.checkpoint_interval == 0:
+                with self.profiler.span("snapshot"):
+                    # keep log.csv in line with the checkpoint
+                    self.logger.flush()
+                    self.save_checkpoint(self.save_dir)
 
         self.snapshot(self.save_dir, "finish")
+        self.save_checkpoint(self.save_dir)
+        self.checkpoint_writer.close()
+        self.logger.close()
+        if self.profiler.enabled:
+            self.profiler.export_chrome_trace(
+                osp.join(self.save_dir, "trace.json"))
         self.collector.terminate()
 
     def update(self, batch):
         raise NotImplementedError
 
+    @contextlib.contextmanager
+    def precision_scope(self):
+        if self.autocast_dtype is None:
+            yield
+            return
+        for net in self.networks:
+            networks.set_precision(net, self.autocast_dtype)
+        try:
+            yield
+        finally:
+            for net in self.networks:
+                networks.set_precision(net, None)
+
     def _update_target_networks(self):
-        if self.use_soft_update:
-            for net, target_net in self.target_networks:
-                atu.soft_update_from_to(net, target_net, self.tau)
-        else:
-            if self.training_update_num % self.target_hard_update_period == 0:
+        with self.profiler.span("target_update"):
+            if self.use_soft_update:
                 for net, target_net in self.target_networks:
-                    atu.copy_model_params_from_to(net, target_net)
+                    atu.soft_update_from_to(net, target_net, self.tau)
+            else:
+                if self.training_update_num % \
+                        self.target_hard_update_period == 0:
+                    for net, target_net in self.target_networks:
+                        atu.copy_model_params_from_to(net, target_net)
 
     @property
     def networks(self):
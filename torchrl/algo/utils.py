@@ -2,11 +2,74 @@ import torch
 import numpy as np
 
 
-def quantile_regression_loss(coefficient, source, target):
-    diff = target.unsqueeze(-1) - source.unsqueeze(1)
-    loss = huber(diff) * (coefficient - (diff.detach() < 0).float()).abs()
-    loss = loss.mean()
-    return loss
+class QuantileHuberLoss(torch.autograd.Function):
+    """
+    Quantile Huber loss averaged over batch x target x source quantiles
+    Pairwise differences are processed in chunks of target quantiles,
+    gradients are accumulated during forward, so no B x N x N tensor
+    is kept for backward
+    """
+    @staticmethod
+    def forward(ctx, coefficient, source, target, k, chunk_elements):
+        batch_size, source_num = source.shape
+        target_num = target.shape[-1]
+
+        tau = coefficient.reshape(1, 1, source_num).to(source.dtype)
+        # |tau - 1{diff < 0}| = tau + 1{diff < 0} * (1 - 2 * tau)
+        flip = 1 - 2 * tau
+
+        need_source_grad = ctx.needs_input_grad[1]
+        need_target_grad = ctx.needs_input_grad[2]
+        source_grad = torch.zeros_like(source) if need_source_grad else None
+        target_grad = torch.zeros_like(target) if need_target_grad else None
+
+        loss = source.new_zeros(())
+        chunk = max(1, chunk_elements // (batch_size * source_num))
+        for start in range(0, target_num, chunk):
+            end = min(start + chunk, target_num)
+            diff = target[:, start:end, None] - source[:, None, :]
+            weight = (diff < 0).to(diff.dtype).mul_(flip).add_(tau)
+
+            # huber(x) = 0.5 * q^2 + k * (|x| - q), q = min(|x|, k)
+            abs_diff = diff.abs()
+            quad = abs_diff.clamp(max=k)
+            elem_loss = abs_diff.sub_(quad).mul_(k).addcmul_(
+                quad, quad, value=0.5)
+            loss += elem_loss.mul_(weight).sum()
+
+            if need_source_grad or need_target_grad:
+                diff_grad = diff.clamp_(-k, k).mul_(weight)
+                if need_source_grad:
+                    source_grad -= diff_grad.sum(1)
+                if need_target_grad:
+                    target_grad[:, start:end] += diff_grad.sum(2)
+
+        norm = 1. / (batch_size * target_num * source_num)
+        if source_grad is not None:
+            source_grad.mul_(norm)
+        if target_grad is not None:
+            target_grad.mul_(norm)
+        ctx.save_for_backward(source_grad, target_grad)
+        return loss * norm
+
+    @staticmethod
+    def backward(ctx, grad_output):
+        source_grad, target_grad = ctx.saved_tensors
+        if source_grad is not None:
+            source_grad = source_grad * grad_output
+        if target_grad is not None:
+            target_grad = target_grad * grad_output
+        return None, source_grad, target_grad, None, None
+
+
+def quantile_regression_loss(
+        coefficient, source, target, k=1.0, chunk_elements=2 ** 22):
+    """
+    coefficient: 1 x N quantile midpoints of source
+    source: B x N predicted quantiles, target: B x N' target quantiles
+    """
+    return QuantileHuberLoss.apply(
+        coefficient, source, target, k, chunk_elements)
 
 
 def huber(x, k=1.0):
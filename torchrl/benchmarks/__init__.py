@@ -0,0 +1,7 @@
+from .base import BENCHMARKS, Case, Skip, register
+from .base import run_benchmarks, save_results, compare_results
+from . import buffers
+from . import envs
+from . import algos
+from . import imports
+from . import networks
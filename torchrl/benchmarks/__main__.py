@@ -0,0 +1,39 @@
+import argparse
+import sys
+import torch
+from torchrl.benchmarks import run_benchmarks, save_results, compare_results
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='TorchRL Benchmarks')
+    parser.add_argument('--filter', type=str, default=None,
+                        help='regex selecting benchmarks to run')
+    parser.add_argument('--number', type=int, default=20,
+                        help='calls per measurement')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='measurements per benchmark')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='torch intra-op threads, fixed for comparable '
+                        'results')
+    parser.add_argument('--output', type=str, default=None,
+                        help='write results as json')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='json results of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as regression')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    torch.set_num_threads(args.threads)
+    results = run_benchmarks(
+        args.filter, number=args.number, repeat=args.repeat, seed=args.seed)
+    if args.output is not None:
+        save_results(results, args.output)
+    if args.compare is not None:
+        regressions = compare_results(results, args.compare, args.threshold)
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,224 @@
+import shutil
+import tempfile
+import types
+import gym
+import numpy as np
+import torch
+import torchrl.networks as networks
+import torchrl.policies as policies
+from torchrl.algo import DQN, QRDQN, BootstrappedDQN, SAC, TwinSACQ, \
+    TD3, DDPG, A2C, PPO, TRPO, VMPO
+from .base import register, Case
+
+
+OBS_DIM = 17
+ACT_DIM = 6
+ACT_NUM = 4
+QUANTILE_NUM = 50
+HEAD_NUM = 10
+BATCH_SIZE = 256
+HIDDEN_SHAPES = [256, 256]
+
+
+def continuous_env():
+    return types.SimpleNamespace(
+        observation_space=gym.spaces.Box(
+            low=-np.inf, high=np.inf, shape=(OBS_DIM,), dtype=np.float32),
+        action_space=gym.spaces.Box(
+            low=-1., high=1., shape=(ACT_DIM,), dtype=np.float32))
+
+
+def discrete_env():
+    return types.SimpleNamespace(
+        observation_space=gym.spaces.Box(
+            low=-np.inf, high=np.inf, shape=(OBS_DIM,), dtype=np.float32),
+        action_space=gym.spaces.Discrete(ACT_NUM))
+
+
+def general_setting(env):
+    return {
+        "env": env,
+        "collector": types.SimpleNamespace(epoch_frames=1),
+        "batch_size": BATCH_SIZE,
+        "device": "cpu",
+        "save_dir": tempfile.mkdtemp()
+    }
+
+
+def update_case(agent, batch):
+    def teardown():
+        # stop the checkpoint writer thread started by the agent
+        agent.checkpoint_writer.close()
+        if agent.logger is not None:
+            agent.logger.close()
+        shutil.rmtree(agent.save_dir, ignore_errors=True)
+
+    return Case(
+        lambda: agent.update(batch),
+        items=BATCH_SIZE, unit="samples", teardown=teardown)
+
+
+def off_policy_batch(acts):
+    return {
+        "obs": np.random.randn(BATCH_SIZE, OBS_DIM),
+        "next_obs": np.random.randn(BATCH_SIZE, OBS_DIM),
+        "acts": acts,
+        "rewards": np.random.randn(BATCH_SIZE, 1),
+        "terminals": (np.random.rand(BATCH_SIZE, 1) < 0.01).astype(
+            np.float32)
+    }
+
+
+def continuous_acts():
+    return np.random.uniform(-0.99, 0.99, (BATCH_SIZE, ACT_DIM))
+
+
+def discrete_acts():
+    return np.random.randint(ACT_NUM, size=(BATCH_SIZE, 1))
+
+
+def on_policy_batch():
+    return {
+        "obs": np.random.randn(BATCH_SIZE, OBS_DIM),
+        "acts": np.random.randn(BATCH_SIZE, ACT_DIM),
+        "advs": np.random.randn(BATCH_SIZE, 1),
+        "estimate_returns": np.random.randn(BATCH_SIZE, 1),
+        "values": np.random.randn(BATCH_SIZE, 1)
+    }
+
+
+def mlp(input_shape, output_shape, net_class=networks.Net, **kwargs):
+    return net_class(
+        input_shape=input_shape,
+        output_shape=output_shape,
+        base_type=networks.MLPBase,
+        hidden_shapes=HIDDEN_SHAPES,
+        **kwargs)
+
+
+def q_pair():
+    return [mlp(OBS_DIM + ACT_DIM, 1, networks.QNet) for _ in range(2)]
+
+
+@register("algo/dqn_update")
+def dqn_update():
+    qf = mlp(OBS_DIM, ACT_NUM)
+    pf = policies.EpsilonGreedyDQNDiscretePolicy(
+        qf=qf, start_epsilon=1., end_epsilon=0.1,
+        decay_frames=1000, action_shape=ACT_NUM)
+    agent = DQN(
+        qf=qf, pf=pf, qlr=1e-4, **general_setting(discrete_env()))
+    return update_case(agent, off_policy_batch(discrete_acts()))
+
+
+@register("algo/qrdqn_update")
+def qrdqn_update():
+    qf = mlp(OBS_DIM, ACT_NUM * QUANTILE_NUM)
+    pf = policies.EpsilonGreedyQRDQNDiscretePolicy(
+        qf=qf, start_epsilon=1., end_epsilon=0.1,
+        decay_frames=1000, action_shape=ACT_NUM,
+        quantile_num=QUANTILE_NUM)
+    agent = QRDQN(
+        qf=qf, pf=pf, qlr=1e-4, quantile_num=QUANTILE_NUM,
+        **general_setting(discrete_env()))
+    return update_case(agent, off_policy_batch(discrete_acts()))
+
+
+@register("algo/bootstrapped_dqn_update")
+def bootstrapped_dqn_update():
+    qf = mlp(OBS_DIM, ACT_NUM, networks.BootstrappedNet, head_num=HEAD_NUM)
+    pf = policies.BootstrappedDQNDiscretePolicy(
+        qf=qf, head_num=HEAD_NUM, action_shape=ACT_NUM)
+    agent = BootstrappedDQN(
+        qf=qf, pf=pf, qlr=1e-4, head_num=HEAD_NUM,
+        **general_setting(discrete_env()))
+    batch = off_policy_batch(discrete_acts())
+    batch["masks"] = np.random.binomial(
+        n=1, p=0.5, size=(BATCH_SIZE, HEAD_NUM))
+    return update_case(agent, batch)
+
+
+@register("algo/sac_update")
+def sac_update():
+    pf = mlp(
+        OBS_DIM, 2 * ACT_DIM, policies.GuassianContPolicy, tanh_action=True)
+    vf = mlp(OBS_DIM, 1)
+    qf = mlp(OBS_DIM + ACT_DIM, 1, networks.QNet)
+    agent = SAC(
+        pf=pf, vf=vf, qf=qf, plr=3e-4, vlr=3e-4, qlr=3e-4,
+        **general_setting(continuous_env()))
+    return update_case(agent, off_policy_batch(continuous_acts()))
+
+
+@register("algo/twin_sac_q_update")
+def twin_sac_q_update():
+    pf = mlp(
+        OBS_DIM, 2 * ACT_DIM, policies.GuassianContPolicy, tanh_action=True)
+    qf1, qf2 = q_pair()
+    agent = TwinSACQ(
+        pf=pf, qf1=qf1, qf2=qf2, plr=3e-4, qlr=3e-4,
+        **general_setting(continuous_env()))
+    return update_case(agent, off_policy_batch(continuous_acts()))
+
+
+@register("algo/td3_update")
+def td3_update():
+    pf = mlp(
+        OBS_DIM, ACT_DIM, policies.FixGuassianContPolicy,
+        norm_std_explore=0.1, tanh_action=True)
+    qf1, qf2 = q_pair()
+    agent = TD3(
+        pf=pf, qf1=qf1, qf2=qf2, plr=1e-3, qlr=1e-3,
+        **general_setting(continuous_env()))
+    return update_case(agent, off_policy_batch(continuous_acts()))
+
+
+@register("algo/ddpg_update")
+def ddpg_update():
+    pf = mlp(
+        OBS_DIM, ACT_DIM, policies.FixGuassianContPolicy,
+        norm_std_explore=0.1, tanh_action=True)
+    qf = mlp(OBS_DIM + ACT_DIM, 1, networks.QNet)
+    agent = DDPG(
+        pf=pf, qf=qf, plr=1e-4, qlr=1e-3,
+        **general_setting(continuous_env()))
+    return update_case(agent, off_policy_batch(continuous_acts()))
+
+
+def actor_critic():
+    pf = mlp(
+        OBS_DIM, ACT_DIM, policies.GuassianContPolicyBasicBias,
+        activation_func=torch.nn.Tanh)
+    vf = mlp(OBS_DIM, 1, activation_func=torch.nn.Tanh)
+    return pf, vf
+
+
+@register("algo/a2c_update")
+def a2c_update():
+    pf, vf = actor_critic()
+    agent = A2C(pf=pf, vf=vf, **general_setting(continuous_env()))
+    return update_case(agent, on_policy_batch())
+
+
+@register("algo/ppo_update")
+def ppo_update():
+    pf, vf = actor_critic()
+    agent = PPO(pf=pf, vf=vf, **general_setting(continuous_env()))
+    return update_case(agent, on_policy_batch())
+
+
+@register("algo/trpo_update")
+def trpo_update():
+    pf, vf = actor_critic()
+    agent = TRPO(
+        pf=pf, vf=vf, max_kl=0.01, cg_damping=0.1, v_opt_times=5,
+        cg_iters=10, residual_tol=1e-10,
+        **general_setting(continuous_env()))
+    return update_case(agent, on_policy_batch())
+
+
+@register("algo/vmpo_update")
+def vmpo_update():
+    pf, vf = actor_critic()
+    agent = VMPO(pf=pf, vf=vf, **general_setting(continuous_env()))
+    return update_case(agent, on_policy_batch())
@@ -0,0 +1,165 @@
+import json
+import platform
+import random
+import re
+import subprocess
+import time
+from collections import OrderedDict
+import numpy as np
+import torch
+
+
+BENCHMARKS = OrderedDict()
+
+
+class Case():
+    """
+    A prepared benchmark
+        func: called once per measurement
+        items: work items processed per call (samples, env steps, ...)
+        number / repeat / warmup: override the suite defaults for slow
+            cases (process startup, imports)
+        check: called with the measurement, returns extra result fields
+            (e.g. whether a time budget is met)
+    """
+    def __init__(self, func, items=1, unit="items", teardown=None,
+                 number=None, repeat=None, warmup=None, check=None):
+        self.func = func
+        self.items = items
+        self.unit = unit
+        self.teardown = teardown
+        self.number = number
+        self.repeat = repeat
+        self.warmup = warmup
+        self.check = check
+
+
+def register(name):
+    """
+    Register a benchmark setup function, which returns a Case
+    """
+    def wrapper(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return wrapper
+
+
+class Skip(Exception):
+    """
+    Raised by setup functions when requirements are not available
+    """
+    pass
+
+
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+def measure(case, number, repeat, warmup=1):
+    number = number if case.number is None else case.number
+    repeat = repeat if case.repeat is None else case.repeat
+    warmup = warmup if case.warmup is None else case.warmup
+    for _ in range(warmup):
+        case.func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.func()
+        timings.append((time.perf_counter() - start) / number)
+
+    timings = np.array(timings)
+    median = float(np.median(timings))
+    result = {
+        "unit": "{}/s".format(case.unit),
+        "throughput": case.items / median,
+        "median_sec": median,
+        "min_sec": float(np.min(timings)),
+        "std_sec": float(np.std(timings)),
+        "number": number,
+        "repeat": repeat
+    }
+    if case.check is not None:
+        result.update(case.check(result))
+    return result
+
+
+def run_benchmarks(pattern=None, number=20, repeat=5, seed=0, verbose=True):
+    results = OrderedDict()
+    for name, setup in BENCHMARKS.items():
+        if pattern is not None and re.search(pattern, name) is None:
+            continue
+        seed_everything(seed)
+        case = None
+        try:
+            case = setup()
+            results[name] = measure(case, number, repeat)
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+            if verbose:
+                print("{:<48} skipped ({})".format(name, e))
+            continue
+        except Exception as e:
+            # a failing case is recorded, the rest of the suite still runs
+            results[name] = {"error": repr(e)}
+            if verbose:
+                print("{:<48} error ({!r})".format(name, e))
+            continue
+        finally:
+            if case is not None and case.teardown is not None:
+                case.teardown()
+        if verbose:
+            print("{:<48} {:>14.1f} {}{}".format(
+                name, results[name]["throughput"], results[name]["unit"],
+                "" if results[name].get("within_budget", True)
+                else "  <== over budget"))
+    return results
+
+
+def get_meta():
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "numpy": np.__version__,
+        "torch_threads": torch.get_num_threads()
+    }
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump({"meta": get_meta(), "results": results}, f, indent=2)
+
+
+def compare_results(current, baseline_path, threshold=0.1):
+    """
+    Compare throughput against a previous result file,
+    returns names of benchmarks slower than (1 - threshold) of baseline
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print("{:<48} {:>10}".format("benchmark", "ratio"))
+    for name, result in current.items():
+        if "throughput" not in result or \
+                "throughput" not in baseline.get(name, {}):
+            continue
+        ratio = result["throughput"] / baseline[name]["throughput"]
+        flag = ""
+        if ratio < 1 - threshold:
+            regressions.append(name)
+            flag = "  <== regression"
+        print("{:<48} {:>10.3f}{}".format(name, ratio, flag))
+    return regressions
@@ -0,0 +1,147 @@
+import numpy as np
+from torchrl.replay_buffers import BaseReplayBuffer
+from torchrl.replay_buffers import MemoryEfficientReplayBuffer
+from torchrl.replay_buffers import FrameStackReplayBuffer
+from torchrl.replay_buffers import OnPolicyReplayBuffer
+from torchrl.env.atari_wrapper import LazyFrames
+from .base import register, Case, Skip
+
+
+BATCH_SIZE = 256
+
+
+def fill_buffer(buffer, size, example_dict):
+    for _ in range(size):
+        buffer.add_sample({
+            key: np.random.randn(*np.shape(value)).astype(np.float32)
+            for key, value in example_dict.items()})
+
+
+def state_example(env_nums=1, obs_dim=17, act_dim=6):
+    return {
+        "obs": np.zeros((env_nums, obs_dim)),
+        "next_obs": np.zeros((env_nums, obs_dim)),
+        "acts": np.zeros((env_nums, act_dim)),
+        "rewards": np.zeros((env_nums, 1)),
+        "terminals": np.zeros((env_nums, 1))
+    }
+
+
+@register("buffer/base_random_batch")
+def base_random_batch():
+    env_nums = 4
+    buffer = BaseReplayBuffer(
+        max_replay_buffer_size=int(1e5), env_nums=env_nums)
+    example = state_example(env_nums)
+    fill_buffer(buffer, buffer._max_replay_buffer_size, example)
+    sample_key = list(example.keys())
+    return Case(
+        lambda: buffer.random_batch(BATCH_SIZE, sample_key),
+        items=BATCH_SIZE, unit="samples")
+
+
+@register("buffer/memory_efficient_random_batch")
+def memory_efficient_random_batch():
+    buffer = MemoryEfficientReplayBuffer(max_replay_buffer_size=10000)
+    frames = [np.random.randint(0, 255, (84, 84, 1), dtype=np.uint8)
+              for _ in range(4)]
+    for _ in range(buffer._max_replay_buffer_size):
+        frames = frames[1:] + [
+            np.random.randint(0, 255, (84, 84, 1), dtype=np.uint8)]
+        buffer.add_sample({
+            "obs": LazyFrames(list(frames)),
+            "acts": np.random.randint(4, size=(1,)),
+            "rewards": np.zeros(1),
+            "terminals": np.zeros(1)})
+    sample_key = ["obs", "acts", "rewards", "terminals"]
+    return Case(
+        lambda: buffer.random_batch(32, sample_key),
+        items=32, unit="samples")
+
+
+@register("buffer/frame_stack_random_batch")
+def frame_stack_random_batch():
+    env_nums = 4
+    buffer = FrameStackReplayBuffer(
+        max_replay_buffer_size=40000, env_nums=env_nums)
+    obs = np.random.randint(
+        0, 255, (env_nums, 4, 84, 84), dtype=np.uint8)
+    for _ in range(buffer._max_replay_buffer_size):
+        next_obs = np.concatenate([obs[:, 1:], np.random.randint(
+            0, 255, (env_nums, 1, 84, 84), dtype=np.uint8)], axis=1)
+        buffer.add_sample({
+            "obs": obs,
+            "next_obs": next_obs,
+            "acts": np.random.randint(4, size=(env_nums, 1)),
+            "rewards": np.zeros((env_nums, 1)),
+            "terminals": np.zeros((env_nums, 1))})
+        obs = next_obs
+    sample_key = ["obs", "next_obs", "acts", "rewards", "terminals"]
+    return Case(
+        lambda: buffer.random_batch(BATCH_SIZE, sample_key),
+        items=BATCH_SIZE, unit="samples")
+
+
+@register("buffer/shared_random_batch")
+def shared_random_batch():
+    try:
+        from torchrl.replay_buffers.shared.base import SharedBaseReplayBuffer
+    except ImportError as e:
+        raise Skip(e)
+    worker_nums = 4
+    buffer = SharedBaseReplayBuffer(
+        max_replay_buffer_size=int(1e5), worker_nums=worker_nums)
+    example = {key: value[0] for key, value in state_example().items()}
+    buffer.build_by_example(example)
+    for rank in range(worker_nums):
+        for _ in range(buffer._max_replay_buffer_size):
+            buffer.add_sample({
+                key: np.random.randn(*np.shape(value))
+                for key, value in example.items()}, rank)
+    sample_key = list(example.keys())
+    return Case(
+        lambda: buffer.random_batch(BATCH_SIZE, sample_key),
+        items=BATCH_SIZE, unit="samples")
+
+
+def on_policy_buffer(time_limit_filter, steps=2048, env_nums=8):
+    buffer = OnPolicyReplayBuffer(
+        max_replay_buffer_size=steps * env_nums,
+        env_nums=env_nums,
+        time_limit_filter=time_limit_filter)
+    for _ in range(steps):
+        buffer.add_sample({
+            "rewards": np.random.randn(env_nums, 1),
+            "values": np.random.randn(env_nums, 1),
+            "terminals": (np.random.rand(env_nums, 1) < 0.001).astype(
+                np.float32),
+            "time_limits": (np.random.rand(env_nums, 1) < 0.001).astype(
+                np.float32)})
+    last_value = np.random.randn(env_nums, 1)
+    return buffer, last_value, steps * env_nums
+
+
+@register("buffer/gae")
+def gae():
+    buffer, last_value, items = on_policy_buffer(False)
+    return Case(
+        lambda: buffer.generalized_advantage_estimation(
+            last_value, 0.99, 0.95),
+        items=items, unit="transitions")
+
+
+@register("buffer/gae_time_limit_filter")
+def gae_time_limit_filter():
+    buffer, last_value, items = on_policy_buffer(True)
+    return Case(
+        lambda: buffer.generalized_advantage_estimation(
+            last_value, 0.99, 0.95),
+        items=items, unit="transitions")
+
+
+@register("buffer/discount_reward")
+def discount_reward():
+    buffer, last_value, items = on_policy_buffer(False)
+    return Case(
+        lambda: buffer.discount_reward(last_value, 0.99),
+        items=items, unit="transitions")
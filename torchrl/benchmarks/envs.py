@@ -0,0 +1,126 @@
+import numpy as np
+from torchrl.env import get_vec_env, get_subprocvec_env
+from .base import register, Case
+
+
+STEPS = 100
+ENV_NUMS = 8
+PROC_NUMS = 4
+
+
+def rollout(env, steps=STEPS):
+    continuous = len(env.action_space.shape) > 0
+
+    def func():
+        for _ in range(steps):
+            if continuous:
+                actions = np.random.uniform(
+                    -1., 1., (env.env_nums,) + env.action_space.shape)
+            else:
+                actions = np.random.randint(
+                    env.action_space.n, size=(env.env_nums, 1))
+            _, _, dones, infos = env.step(actions)
+            if np.any(dones) and "terminal_obs" not in infos:
+                env.partial_reset(np.squeeze(dones, axis=-1))
+    return func
+
+
+def env_case(env):
+    env.reset()
+    return Case(
+        rollout(env), items=STEPS * env.env_nums,
+        unit="steps", teardown=env.close)
+
+
+@register("env/vec_env_step")
+def vec_env_step():
+    return env_case(get_vec_env(
+        "SyntheticContinuous-v0", {}, ENV_NUMS))
+
+
+@register("env/vec_env_step_fused")
+def vec_env_step_fused():
+    return env_case(get_vec_env(
+        "SyntheticContinuous-v0", {"fuse_wrappers": True}, ENV_NUMS))
+
+
+@register("env/subproc_vec_env_step")
+def subproc_vec_env_step():
+    return env_case(get_subprocvec_env(
+        "SyntheticContinuous-v0", {}, ENV_NUMS, PROC_NUMS))
+
+
+@register("env/subproc_vec_env_step_auto_reset")
+def subproc_vec_env_step_auto_reset():
+    return env_case(get_subprocvec_env(
+        "SyntheticContinuous-v0", {}, ENV_NUMS, PROC_NUMS,
+        auto_reset=True))
+
+
+@register("env/subproc_vec_env_pixel_step_vec_preprocess")
+def subproc_vec_env_pixel_step_vec_preprocess():
+    env_param = {"frame_stack": True, "vec_preprocess": True}
+    return env_case(get_subprocvec_env(
+        "SyntheticPixelNoFrameskip-v0", env_param, ENV_NUMS, PROC_NUMS))
+
+
+@register("env/subproc_vec_env_startup")
+def subproc_vec_env_startup():
+    # spawn workers and wait for their first observations
+    def func():
+        env = get_subprocvec_env(
+            "SyntheticContinuous-v0", {}, ENV_NUMS, PROC_NUMS)
+        env.reset()
+        env.close()
+    # a few startups are enough, the suite defaults would start 101
+    return Case(func, items=PROC_NUMS, unit="workers",
+                number=1, repeat=3, warmup=0)
+
+
+@register("env/subproc_vec_env_step_latency")
+def subproc_vec_env_step_latency():
+    # cpu bound 0.5ms +- 0.25ms steps, measures how well workers overlap
+    env_param = {"synthetic": {
+        "step_latency": 5e-4, "latency_jitter": 2.5e-4, "busy_wait": True}}
+    return env_case(get_subprocvec_env(
+        "SyntheticContinuous-v0", env_param, ENV_NUMS, PROC_NUMS))
+
+
+@register("env/subproc_vec_env_pixel_step")
+def subproc_vec_env_pixel_step():
+    env_param = {"frame_stack": True}
+    return env_case(get_subprocvec_env(
+        "SyntheticPixelNoFrameskip-v0", env_param, ENV_NUMS, PROC_NUMS))
+
+
+@register("env/subproc_vec_env_step_repeat")
+def subproc_vec_env_step_repeat():
+    # 4 env steps per round trip to the workers
+    env = get_subprocvec_env(
+        "SyntheticContinuous-v0", {}, ENV_NUMS, PROC_NUMS)
+    env.reset()
+
+    def func():
+        for _ in range(STEPS // 4):
+            actions = np.random.uniform(
+                -1., 1., (env.env_nums,) + env.action_space.shape)
+            _, _, dones, _ = env.step_repeat(actions, 4)
+            if np.any(dones):
+                env.partial_reset(np.squeeze(dones, axis=-1))
+    return Case(func, items=STEPS * env.env_nums,
+                unit="steps", teardown=env.close)
+
+
+@register("env/subproc_vec_env_step_sequence")
+def subproc_vec_env_step_sequence():
+    # whole open loop rollout in one round trip
+    env = get_subprocvec_env(
+        "SyntheticContinuous-v0", {}, ENV_NUMS, PROC_NUMS)
+    env.reset()
+
+    def func():
+        actions = np.random.uniform(
+            -1., 1., (STEPS, env.env_nums) + env.action_space.shape)
+        env.step_sequence(actions)
+    return Case(func, items=STEPS * env.env_nums,
+                unit="steps", teardown=env.close)
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import time
+from .base import register, Case
+
+
+# modules imported by spawned SubProcVecEnv workers should add well under
+# a second on top of the torch / gym imports every worker pays anyway,
+# so that starting workers does not dominate short runs
+WORKER_IMPORT_BUDGET = 1.0
+BASELINE_IMPORT = "import torch, gym"
+
+MODULES = [
+    ("torchrl", None),
+    ("torchrl.utils", None),
+    ("torchrl.algo", None),
+    ("torchrl.env.synthetic", WORKER_IMPORT_BUDGET),
+    ("torchrl.env.get_env", WORKER_IMPORT_BUDGET),
+    ("torchrl.env.subproc_vecenv", WORKER_IMPORT_BUDGET)
+]
+
+
+def time_import(statement):
+    # fresh interpreter, nothing cached in sys.modules
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True)
+    return time.perf_counter() - start
+
+
+def import_case(module, budget):
+    """
+    Single shot, every call starts a fresh interpreter
+    with a budget, the baseline import is timed once beforehand and the
+    check records the overhead and whether it is within budget
+    """
+    baseline = time_import(BASELINE_IMPORT) if budget is not None else None
+
+    def func():
+        time_import("import {}".format(module))
+
+    def check(result):
+        if budget is None:
+            return {}
+        overhead = result["median_sec"] - baseline
+        return {
+            "budget_sec": budget,
+            "overhead_sec": overhead,
+            "within_budget": overhead <= budget
+        }
+    return Case(func, items=1, unit="imports",
+                number=1, repeat=1, warmup=0, check=check)
+
+
+def register_import(module, budget):
+    @register("import/{}".format(module))
+    def setup():
+        return import_case(module, budget)
+
+
+for module, budget in MODULES:
+    register_import(module, budget)
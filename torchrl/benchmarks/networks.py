@@ -0,0 +1,73 @@
+import torch
+import torchrl.networks as networks
+from .base import register, Case
+
+
+# Nature DQN shapes used by the Atari configs
+INPUT_SHAPE = (4, 84, 84)
+HIDDEN_SHAPES = [
+    [32, [8, 8], [4, 4], [0, 0]],
+    [64, [4, 4], [2, 2], [0, 0]],
+    [64, [3, 3], [1, 1], [0, 0]]
+]
+TRAIN_BATCH_SIZE = 32
+ACT_BATCH_SIZE = 8
+
+
+def cnn(channels_last):
+    return networks.Net(
+        output_shape=6,
+        base_type=networks.CNNBase,
+        input_shape=INPUT_SHAPE,
+        hidden_shapes=HIDDEN_SHAPES,
+        append_hidden_shapes=[512],
+        uint8_input=True,
+        channels_last=channels_last)
+
+
+def frames(batch_size):
+    return torch.randint(
+        0, 256, (batch_size,) + INPUT_SHAPE, dtype=torch.uint8)
+
+
+def train_case(channels_last):
+    net = cnn(channels_last)
+    optimizer = torch.optim.Adam(net.parameters(), lr=1e-4)
+    x = frames(TRAIN_BATCH_SIZE)
+
+    def func():
+        loss = net(x).pow(2).mean()
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+    return Case(func, items=TRAIN_BATCH_SIZE, unit="samples")
+
+
+def act_case(channels_last):
+    net = cnn(channels_last)
+    x = frames(ACT_BATCH_SIZE)
+
+    def func():
+        with torch.no_grad():
+            net(x)
+    return Case(func, items=ACT_BATCH_SIZE, unit="samples")
+
+
+@register("network/cnn_train")
+def cnn_train():
+    return train_case(False)
+
+
+@register("network/cnn_train_channels_last")
+def cnn_train_channels_last():
+    return train_case(True)
+
+
+@register("network/cnn_act")
+def cnn_act():
+    return act_case(False)
+
+
+@register("network/cnn_act_channels_last")
+def cnn_act_channels_last():
+    return act_case(True)
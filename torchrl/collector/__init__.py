@@ -1,4 +1,5 @@
 from .base import BaseCollector
 from .base import VecCollector
 from .on_policy import OnPolicyCollectorBase
-from .on_policy import VecOnPolicyCollector
\ No newline at end of file
+from .on_policy import VecOnPolicyCollector
+from .rollout import VecRolloutCollector
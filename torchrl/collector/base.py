@@ -4,10 +4,15 @@ import torch.multiprocessing as mp
 import copy
 import numpy as np
 import gym
-from torchrl.env.vecenv import VecEnv
+from torchrl.env.vecenv import VecEnv, step_repeat
+from torchrl.utils.profiler import NULL_PROFILER
+from torchrl.networks.base import obs_to_tensor
 
 
 class BaseCollector:
+    # replaced by the algorithm's profiler when profiling is enabled
+    profiler = NULL_PROFILER
+
     def __init__(
             self,
             env, eval_env, pf, replay_buffer,
@@ -16,7 +21,16 @@ class BaseCollector:
             eval_episodes=1,
             eval_render=False,
             device='cpu',
-            max_episode_frames=999):
+            max_episode_frames=999,
+            action_repeat=1):
+        """
+        action_repeat: each action is repeated action_repeat env steps
+            (stopping at done) and their rewards summed, vec envs repeat
+            inside their workers so one round trip covers all repeats
+            max_episode_frames still counts env steps, an episode is cut
+            at the first agent step reaching it
+            epoch_frames counts agent steps
+        """
 
         self.pf = pf
         self.replay_buffer = replay_buffer
@@ -35,6 +49,8 @@ class BaseCollector:
         self.eval_env._reward_scale = 1
         self.eval_episodes = eval_episodes
         self.eval_render = eval_render
+        # exported actor (InferenceActor) used for evaluation if set
+        self.eval_pf = None
 
         self.current_ob = self.env.reset()
 
@@ -48,9 +64,15 @@ class BaseCollector:
         self.epoch_frames = epoch_frames
         self.sample_epoch_frames = epoch_frames
         self.max_episode_frames = max_episode_frames
+        self.action_repeat = action_repeat
 
         self.current_step = 0
 
+    def _env_step(self, env, act):
+        if self.action_repeat > 1:
+            return step_repeat(env, act, self.action_repeat)
+        return env.step(act)
+
     def start_episode(self):
         pass
 
@@ -58,8 +80,9 @@ class BaseCollector:
         pass
 
     def take_actions(self):
-        out = self.pf.explore(
-            torch.Tensor(self.current_ob).to(self.device).unsqueeze(0))
+        with self.profiler.span("policy_forward"), torch.no_grad():
+            out = self.pf.explore(
+                obs_to_tensor(self.current_ob, self.device).unsqueeze(0))
         act = out["action"]
         act = act.detach().cpu().numpy()
 
@@ -69,10 +92,12 @@ class BaseCollector:
             print("NaN detected. BOOM")
             exit()
 
-        next_ob, reward, done, info = self.env.step(act)
+        with self.profiler.span("env_step"):
+            next_ob, reward, done, info = self._env_step(self.env, act)
         if self.train_render:
             self.env.render()
-        self.current_step += 1
+        # env steps, envs which are not done ran all action_repeat steps
+        self.current_step += self.action_repeat
         self.train_rew += reward
         sample_dict = {
             "obs": np.expand_dims(self.current_ob, 0),
@@ -95,7 +120,8 @@ class BaseCollector:
             self.train_rews.append(self.train_rew)
             self.train_rew = 0
 
-        self.replay_buffer.add_sample(sample_dict)
+        with self.profiler.span("buffer_add"):
+            self.replay_buffer.add_sample(sample_dict)
 
         self.current_ob = next_ob
 
@@ -130,6 +156,7 @@ class BaseCollector:
             self.eval_env._obs_normalizer = copy.deepcopy(self.env._obs_normalizer)
         self.eval_env.eval()
 
+        eval_pf = self.eval_pf if self.eval_pf is not None else self.pf
         traj_lens = []
         for _ in range(self.eval_episodes):
 
@@ -138,14 +165,15 @@ class BaseCollector:
             traj_len = 0
             done = False
             while not done:
-                act = self.pf.eval_act(torch.Tensor(eval_ob).to(
-                    self.device).unsqueeze(0))
+                with torch.no_grad():
+                    act = eval_pf.eval_act(
+                        obs_to_tensor(eval_ob, self.device).unsqueeze(0))
 
                 if self.continuous and np.isnan(act).any():
                     print("NaN detected. BOOM")
                     exit()
                 try:
-                    eval_ob, r, done, _ = self.eval_env.step(act)
+                    eval_ob, r, done, _ = self._env_step(self.eval_env, act)
                     rew += r
                     traj_len += 1
                     if self.eval_render:
@@ -162,6 +190,31 @@ class BaseCollector:
         eval_infos["eval_traj_length"] = np.mean(traj_lens)
         return eval_infos
 
+    def state_dict(self):
+        state = {}
+        if hasattr(self.env, "get_state"):
+            state["env"] = self.env.get_state()
+        return state
+
+    def load_state_dict(self, state):
+        """
+        Restore env wrapper statistics, simulator states are not saved,
+        so new episodes are started
+        """
+        if "env" in state:
+            self.env.set_state(state["env"])
+        self.current_ob = self.env.reset()
+        self.current_step = 0 * self.current_step
+        self.train_rew = 0 * self.train_rew
+
+    def stats(self):
+        """
+        Performance stats of the collector since last call
+        """
+        if hasattr(self.env, "stats"):
+            return self.env.stats()
+        return {}
+
     def to(self, device):
         for func in self.funcs:
             self.funcs[func].to(device)
@@ -180,10 +233,22 @@ class VecCollector(BaseCollector):
         # assert isinstance(self.env, VecEnv)
         self.current_step = np.zeros((self.env.env_nums, 1))
         self.train_rew = np.zeros_like(self.current_step)
+        if self.action_repeat > 1:
+            # wrappers of vec envs do not process repeated steps
+            assert isinstance(self.env, VecEnv) and \
+                isinstance(self.eval_env, VecEnv), \
+                "action_repeat needs vec envs without obs_norm / " \
+                "vec_preprocess / rew_norm / reward_scale"
+
+    def _env_step(self, env, act):
+        if self.action_repeat > 1:
+            return env.step_repeat(act, self.action_repeat)
+        return env.step(act)
 
     def take_actions(self):
-        out = self.pf.explore(
-            torch.Tensor(self.current_ob).to(self.device).unsqueeze(0))
+        with self.profiler.span("policy_forward"), torch.no_grad():
+            out = self.pf.explore(
+                obs_to_tensor(self.current_ob, self.device).unsqueeze(0))
         act = out["action"]
         act = act.detach().cpu().numpy()
 
@@ -192,18 +257,21 @@ class VecCollector(BaseCollector):
         elif np.isnan(act).any():
             print("NaN detected. BOOM")
             print(self.pf.forward(
-                torch.Tensor(self.current_ob).to(self.device)
+                obs_to_tensor(self.current_ob, self.device)
             ))
             exit()
 
-        next_ob, reward, done, infos = self.env.step(act)
+        with self.profiler.span("env_step"):
+            next_ob, reward, done, infos = self._env_step(self.env, act)
         if self.train_render:
             self.env.render()
-        self.current_step += 1
+        # env steps, envs which are not done ran all action_repeat steps
+        self.current_step += self.action_repeat
 
         sample_dict = {
             "obs": self.current_ob,
-            "next_obs": next_ob,
+            # auto reset envs already return the next episode's obs
+            "next_obs": infos.get("terminal_obs", next_ob),
             "acts": act,
             "rewards": reward,
             "terminals": done,
@@ -220,10 +288,14 @@ class VecCollector(BaseCollector):
         if np.any(done) or \
            np.any(self.current_step >= self.max_episode_frames):
             flag = (self.current_step >= self.max_episode_frames) | done
-            next_ob = self.env.partial_reset(np.squeeze(flag, axis=-1))
             self.current_step[flag] = 0
+            if "terminal_obs" in infos:
+                flag = flag & ~done
+            if np.any(flag):
+                next_ob = self.env.partial_reset(np.squeeze(flag, axis=-1))
 
-        self.replay_buffer.add_sample(sample_dict)
+        with self.profiler.span("buffer_add"):
+            self.replay_buffer.add_sample(sample_dict)
 
         self.current_ob = next_ob
 
@@ -237,6 +309,7 @@ class VecCollector(BaseCollector):
             self.eval_env._obs_normalizer = copy.deepcopy(self.env._obs_normalizer)
         self.eval_env.eval()
 
+        eval_pf = self.eval_pf if self.eval_pf is not None else self.pf
         traj_lens = []
         for _ in range(self.eval_episodes):
             done = np.zeros((self.eval_env.env_nums, 1)).astype(np.bool)
@@ -248,20 +321,22 @@ class VecCollector(BaseCollector):
             traj_len = np.zeros_like(rews)
 
             while not np.all(epi_done):
-                act = self.pf.eval_act(
-                    torch.Tensor(eval_obs).to(self.device)
-                )
+                with torch.no_grad():
+                    act = eval_pf.eval_act(
+                        obs_to_tensor(eval_obs, self.device)
+                    )
                 if self.continuous and np.isnan(act).any():
                     print("NaN detected. BOOM")
-                    print(self.pf.forward(torch.Tensor(eval_obs).to(self.device)))
+                    print(self.pf.forward(obs_to_tensor(eval_obs, self.device)))
                     exit()
                 try:
-                    eval_obs, r, done, _ = self.eval_env.step(act)
+                    eval_obs, r, done, infos = self._env_step(
+                        self.eval_env, act)
                     rews = rews + ((1-epi_done) * r)
                     traj_len = traj_len + (1 - epi_done)
 
                     epi_done = epi_done | done
-                    if np.any(done):
+                    if np.any(done) and "terminal_obs" not in infos:
                         eval_obs = self.eval_env.partial_reset(
                             np.squeeze(done, axis=-1)
                         )
@@ -3,6 +3,7 @@ import numpy as np
 import copy
 from .base import BaseCollector, VecCollector
 from torchrl.env import VecEnv
+from torchrl.networks.base import obs_to_tensor
 
 
 class OnPolicyCollectorBase(BaseCollector):
@@ -13,15 +14,13 @@ class OnPolicyCollectorBase(BaseCollector):
 
     def take_actions(self):
 
-        ob_tensor = torch.Tensor(
-            self.current_ob
-        ).to(self.device).unsqueeze(0)
+        ob_tensor = obs_to_tensor(self.current_ob, self.device).unsqueeze(0)
 
-        out = self.pf.explore(ob_tensor)
+        with self.profiler.span("policy_forward"), torch.no_grad():
+            out = self.pf.explore(ob_tensor)
+            value = self.vf(ob_tensor)
         act = out["action"]
         act = act.detach().cpu().numpy()
-
-        value = self.vf(ob_tensor)
         value = value.cpu().item()
 
         if not self.continuous:
@@ -32,10 +31,12 @@ class OnPolicyCollectorBase(BaseCollector):
             print(self.pf.forward(ob_tensor))
             exit()
 
-        next_ob, reward, done, info = self.env.step(act)
+        with self.profiler.span("env_step"):
+            next_ob, reward, done, info = self._env_step(self.env, act)
         if self.train_render:
             self.env.render()
-        self.current_step += 1
+        # env steps, envs which are not done ran all action_repeat steps
+        self.current_step += self.action_repeat
 
         sample_dict = {
             "obs": np.expand_dims(self.current_ob, 0),
@@ -51,10 +52,9 @@ class OnPolicyCollectorBase(BaseCollector):
 
         if done or self.current_step >= self.max_episode_frames:
             if not done and self.current_step >= self.max_episode_frames:
-                last_ob = torch.Tensor(
-                    next_ob
-                ).to(self.device).unsqueeze(0)
-                last_value = self.vf(last_ob).detach().cpu().item()
+                last_ob = obs_to_tensor(next_ob, self.device).unsqueeze(0)
+                with torch.no_grad():
+                    last_value = self.vf(last_ob).cpu().item()
 
                 sample_dict["terminals"] = [True]
                 sample_dict["rewards"] = [reward + self.discount * last_value]
@@ -67,7 +67,8 @@ class OnPolicyCollectorBase(BaseCollector):
             # self.pf.finish_episode()
             # self.pf.start_episode()
 
-        self.replay_buffer.add_sample(sample_dict)
+        with self.profiler.span("buffer_add"):
+            self.replay_buffer.add_sample(sample_dict)
 
         self.current_ob = next_ob
 
@@ -88,16 +89,14 @@ class VecOnPolicyCollector(VecCollector):
         self.discount = discount
 
     def take_actions(self):
-        ob_tensor = torch.Tensor(
-            self.current_ob
-        ).to(self.device)
+        ob_tensor = obs_to_tensor(self.current_ob, self.device)
 
-        out = self.pf.explore(ob_tensor)
+        with self.profiler.span("policy_forward"), torch.no_grad():
+            out = self.pf.explore(ob_tensor)
+            values = self.vf(ob_tensor)
         acts = out["action"]
         acts = acts.detach().cpu().numpy()
-
-        values = self.vf(ob_tensor)
-        values = values.detach().cpu().numpy()
+        values = values.cpu().numpy()
 
         if type(acts) is not int:
             if np.isnan(acts).any():
@@ -106,15 +105,20 @@ class VecOnPolicyCollector(VecCollector):
                 print(self.pf.forward(ob_tensor))
                 exit()
 
-        next_obs, rewards, dones, infos = self.env.step(acts)
+        with self.profiler.span("env_step"):
+            next_obs, rewards, dones, infos = self._env_step(
+                self.env, acts)
 
         if self.train_render:
             self.env.render()
-        self.current_step += 1
+        # env steps, envs which are not done ran all action_repeat steps
+        self.current_step += self.action_repeat
 
+        # auto reset envs already return the next episode's obs
+        terminal_obs = infos.get("terminal_obs", next_obs)
         sample_dict = {
             "obs": self.current_ob,
-            "next_obs": next_obs,
+            "next_obs": terminal_obs,
             "acts": acts,
             "values": values,
             "rewards": rewards,
@@ -133,22 +137,26 @@ class VecOnPolicyCollector(VecCollector):
            np.any(self.current_step >= self.max_episode_frames):
 
             surpass_flag = self.current_step >= self.max_episode_frames
-            last_ob = torch.Tensor(
-                next_obs
-            ).to(self.device)
+            last_ob = obs_to_tensor(terminal_obs, self.device)
 
-            last_value = self.vf(last_ob).detach().cpu().numpy()
+            with torch.no_grad():
+                last_value = self.vf(last_ob).cpu().numpy()
             sample_dict["terminals"] = dones | surpass_flag
             sample_dict["rewards"] = rewards + \
                 self.discount * last_value * surpass_flag
 
-            next_obs = self.env.partial_reset(
-                np.squeeze(dones | surpass_flag, axis=-1)
-            )
-            self.current_step[dones | surpass_flag] = 0
+            reset_flag = dones | surpass_flag
+            self.current_step[reset_flag] = 0
+            if "terminal_obs" in infos:
+                reset_flag = reset_flag & ~dones
+            if np.any(reset_flag):
+                next_obs = self.env.partial_reset(
+                    np.squeeze(reset_flag, axis=-1)
+                )
 
 
-        self.replay_buffer.add_sample(sample_dict)
+        with self.profiler.span("buffer_add"):
+            self.replay_buffer.add_sample(sample_dict)
 
         self.current_ob = next_obs
 
@@ -7,13 +7,52 @@ import gym
 from collections import deque
 
 from torchrl.collector.base import BaseCollector
-from torchrl.collector.base import EnvInfo
+from torchrl.env.subproc_vecenv import FORKSERVER_PRELOAD
 
 from torchrl.replay_buffers.shared import SharedBaseReplayBuffer
+from torchrl.utils.metrics import get_rss
 
 TIMEOUT_CHILD = 200
 
+
+class EnvInfo():
+    """
+    Settings of a sampling worker, only plain values are pickled into
+    the children, the env is built in the worker by env_cls(*env_args)
+    """
+    def __init__(self, device='cpu', epoch_frames=1000,
+                 max_episode_frames=999, continuous=True,
+                 train_render=False, eval_episodes=1, eval_render=False,
+                 discount=0.99):
+        self.device = device
+        self.epoch_frames = epoch_frames
+        self.max_episode_frames = max_episode_frames
+        self.continuous = continuous
+        self.train_render = train_render
+        self.eval_episodes = eval_episodes
+        self.eval_render = eval_render
+        self.discount = discount
+        self.env_rank = 0
+        self.env = None
+        self.current_step = 0
+
+    def start_episode(self):
+        self.current_step = 0
+
+    def finish_episode(self):
+        pass
+
+
 class ParallelCollector(BaseCollector):
+    """
+    Sampling with worker_nums independent processes
+        env_cls(*env_args) builds the env inside each worker (env_cls
+        should be importable, e.g. torchrl.env.get_env), env is only used
+        for spaces
+        networks are shared with the workers through shared memory
+        start_method: see SubProcVecEnv, forkserver workers are forked
+        from a server with FORKSERVER_PRELOAD (or preload) imported
+    """
     def __init__(
         self,
         env, pf, replay_buffer,
@@ -22,19 +61,32 @@ class ParallelCollector(BaseCollector):
         eval_epochs,
         worker_nums=4,
         eval_worker_nums=1,
+        start_method='spawn',
+        preload=None,
             **kwargs):
 
         super().__init__(
-            env, pf, replay_buffer,
+            env=env, eval_env=env, pf=pf, replay_buffer=replay_buffer,
             **kwargs)
 
         self.env_cls  = env_cls
         self.env_args = env_args
 
-        self.env_info.device = 'cpu' # CPU For multiprocess sampling
+        # CPU For multiprocess sampling
+        self.env_info = EnvInfo(
+            device='cpu',
+            epoch_frames=self.epoch_frames // worker_nums,
+            max_episode_frames=self.max_episode_frames,
+            continuous=self.continuous,
+            train_render=self.train_render,
+            eval_episodes=self.eval_episodes,
+            eval_render=self.eval_render,
+            discount=getattr(self, "discount", 0.99))
         self.shared_funcs = copy.deepcopy(self.funcs)
         for key in self.shared_funcs:
             self.shared_funcs[key].to(self.env_info.device)
+            # children get shared memory handles, not copies
+            self.shared_funcs[key].share_memory()
 
         assert isinstance(replay_buffer, SharedBaseReplayBuffer), \
             "Should Use Shared Replay buffer"
@@ -43,14 +95,21 @@ class ParallelCollector(BaseCollector):
         self.worker_nums = worker_nums
         self.eval_worker_nums = eval_worker_nums
 
-        self.manager = mp.Manager()
+        self.ctx = mp.get_context(start_method)
+        if start_method == "forkserver":
+            if preload is None:
+                preload = list(FORKSERVER_PRELOAD)
+                if env_cls.__module__ != "__main__":
+                    preload.append(env_cls.__module__)
+            self.ctx.set_forkserver_preload(preload)
+        self.manager = self.ctx.Manager()
         self.train_epochs = train_epochs
         self.eval_epochs = eval_epochs
         self.start_worker()
 
     @staticmethod
-    def train_worker_process(cls, shared_funcs, env_info,
-        replay_buffer, shared_que,
+    def train_worker_process(cls, shared_funcs, env_cls, env_args,
+        env_info, env_rank, replay_buffer, shared_que,
         start_barrier, epochs ):
 
         replay_buffer.rebuild_from_tag()
@@ -59,7 +118,8 @@ class ParallelCollector(BaseCollector):
             local_funcs[key].to(env_info.device)
 
         # Rebuild Env
-        env_info.env = env_info.env_cls(**env_info.env_args)
+        env_info.env_rank = env_rank
+        env_info.env = env_cls(*env_args)
 
         c_ob = {
             "ob": env_info.env.reset()
@@ -93,13 +153,13 @@ class ParallelCollector(BaseCollector):
             })
 
     @staticmethod
-    def eval_worker_process(shared_pf, 
+    def eval_worker_process(shared_pf, env_cls, env_args,
         env_info, shared_que, start_barrier, epochs):
 
         pf = copy.deepcopy(shared_pf).to(env_info.device)
 
         # Rebuild Env
-        env_info.env = env_info.env_cls(**env_info.env_args)
+        env_info.env = env_cls(*env_args)
 
         env_info.env.eval()
         env_info.env._reward_scale = 1
@@ -137,30 +197,28 @@ class ParallelCollector(BaseCollector):
     def start_worker(self):
         self.workers = []
         self.shared_que = self.manager.Queue(self.worker_nums)
-        self.start_barrier = mp.Barrier(self.worker_nums+1)
+        self.start_barrier = self.ctx.Barrier(self.worker_nums+1)
                 
         self.eval_workers = []
         self.eval_shared_que = self.manager.Queue(self.eval_worker_nums)
-        self.eval_start_barrier = mp.Barrier(self.eval_worker_nums+1)
-
-        self.env_info.env_cls  = self.env_cls
-        self.env_info.env_args = self.env_args
+        self.eval_start_barrier = self.ctx.Barrier(self.eval_worker_nums+1)
 
         for i in range(self.worker_nums):
-            self.env_info.env_rank = i
-            p = mp.Process(
+            p = self.ctx.Process(
                 target=self.__class__.train_worker_process,
                 args=( self.__class__, self.shared_funcs,
-                    self.env_info, self.replay_buffer, 
+                    self.env_cls, self.env_args,
+                    self.env_info, i, self.replay_buffer,
                     self.shared_que, self.start_barrier,
                     self.train_epochs))
             p.start()
             self.workers.append(p)
 
         for i in range(self.eval_worker_nums):
-            eval_p = mp.Process(
+            eval_p = self.ctx.Process(
                 target=self.__class__.eval_worker_process,
                 args=(self.shared_funcs["pf"],
+                    self.env_cls, self.env_args,
                     self.env_info, self.eval_shared_que, self.eval_start_barrier,
                     self.eval_epochs))
             eval_p.start()
@@ -206,6 +264,19 @@ class ParallelCollector(BaseCollector):
             'eval_rewards':eval_rews,
         }
 
+    def stats(self):
+        stats = {
+            "train_queue_depth": self.shared_que.qsize(),
+            "eval_queue_depth": self.eval_shared_que.qsize()
+        }
+        for name, workers in [("train_worker", self.workers),
+                              ("eval_worker", self.eval_workers)]:
+            for rank, p in enumerate(workers):
+                rss = get_rss(p.pid)
+                if rss is not None:
+                    stats["{}_{}_rss_mb".format(name, rank)] = rss / 2 ** 20
+        return stats
+
     @property
     def funcs(self):
         return {
@@ -216,30 +287,28 @@ class AsyncParallelCollector(ParallelCollector):
     def start_worker(self):
         self.workers = []
         self.shared_que = self.manager.Queue(self.worker_nums)
-        self.start_barrier = mp.Barrier(self.worker_nums)
+        self.start_barrier = self.ctx.Barrier(self.worker_nums)
                 
         self.eval_workers = []
         self.eval_shared_que = self.manager.Queue(self.eval_worker_nums)
-        self.eval_start_barrier = mp.Barrier(self.eval_worker_nums)
-
-        self.env_info.env_cls  = self.env_cls
-        self.env_info.env_args = self.env_args
+        self.eval_start_barrier = self.ctx.Barrier(self.eval_worker_nums)
 
         for i in range(self.worker_nums):
-            self.env_info.env_rank = i
-            p = mp.Process(
+            p = self.ctx.Process(
                 target=self.__class__.train_worker_process,
                 args=( self.__class__, self.shared_funcs,
-                    self.env_info, self.replay_buffer, 
+                    self.env_cls, self.env_args,
+                    self.env_info, i, self.replay_buffer,
                     self.shared_que, self.start_barrier,
                     self.train_epochs))
             p.start()
             self.workers.append(p)
 
         for i in range(self.eval_worker_nums):
-            eval_p = mp.Process(
+            eval_p = self.ctx.Process(
                 target=self.__class__.eval_worker_process,
-                args=(self.pf,
+                args=(self.shared_funcs["pf"],
+                    self.env_cls, self.env_args,
                     self.env_info, self.eval_shared_que, self.eval_start_barrier,
                     self.eval_epochs))
             eval_p.start()
@@ -52,7 +52,7 @@ class ParallelOnPolicyCollector(ParallelCollector):
         if done or env_info.current_step >= env_info.max_episode_frames:
             if not done and env_info.current_step >= env_info.max_episode_frames:
                 last_ob = torch.Tensor( next_ob ).to(env_info.device).unsqueeze(0) 
-                last_value = env_info.vf( last_ob ).item()
+                last_value = vf( last_ob ).item()
                 
                 sample_dict["terminals"] = [True]
                 sample_dict["rewards"] = [ reward + env_info.discount * last_value ]
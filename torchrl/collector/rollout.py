@@ -0,0 +1,228 @@
+import copy
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from .on_policy import VecOnPolicyCollector
+from torchrl.networks.base import obs_to_tensor
+
+BUFFER_KEYS = ["obs", "next_obs", "acts", "values",
+               "rewards", "terminals", "time_limits"]
+
+
+def shared_view(shared_array):
+    raw, dtype, shape = shared_array
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+def rollout_worker(child_pipe, env_func, env_args, funcs,
+                   shared_arrays, env_slice, epoch_frames,
+                   max_episode_frames, discount, seed):
+    """
+    Roll out epoch_frames steps of its envs with the shared cpu copies of
+    pf / vf on every 'rollout' command, samples are written to its env
+    slice of the shared buffer arrays, only episode rewards are sent back
+    seed: seed + rank of the worker, for torch / numpy / its envs
+    """
+    # many workers share the cores, one thread each
+    torch.set_num_threads(1)
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+    env = env_func(*env_args)
+    env.seed(seed)
+    env.train()
+    pf, vf = funcs["pf"], funcs["vf"]
+    buffers = {key: shared_view(value)[:, env_slice]
+               for key, value in shared_arrays.items()}
+
+    current_ob = env.reset()
+    current_step = np.zeros((env.env_nums, 1))
+    train_rew = np.zeros_like(current_step)
+    try:
+        while True:
+            command = child_pipe.recv()
+            if command == 'rollout':
+                start = time.perf_counter()
+                train_rews = []
+                epoch_reward = 0
+                for t in range(epoch_frames):
+                    ob_tensor = obs_to_tensor(current_ob, "cpu")
+                    with torch.no_grad():
+                        acts = pf.explore(ob_tensor)["action"].numpy()
+                        values = vf(ob_tensor).numpy()
+
+                    next_obs, rewards, dones, infos = env.step(acts)
+                    current_step += 1
+                    train_rew += rewards
+                    epoch_reward += np.sum(rewards)
+                    if np.any(dones):
+                        train_rews += list(train_rew[dones])
+                        train_rew[dones] = 0
+
+                    terminals = dones
+                    surpass_flag = current_step >= max_episode_frames
+                    if np.any(surpass_flag):
+                        with torch.no_grad():
+                            last_value = vf(obs_to_tensor(
+                                next_obs, "cpu")).numpy()
+                        terminals = dones | surpass_flag
+                        rewards = rewards + \
+                            discount * last_value * surpass_flag
+
+                    buffers["obs"][t] = current_ob
+                    buffers["next_obs"][t] = next_obs
+                    buffers["acts"][t] = acts.reshape(
+                        buffers["acts"].shape[1:])
+                    buffers["values"][t] = values
+                    buffers["rewards"][t] = rewards
+                    buffers["terminals"][t] = terminals
+                    buffers["time_limits"][t] = \
+                        infos["time_limit"][:, np.newaxis] \
+                        if "time_limit" in infos else False
+
+                    if np.any(terminals):
+                        next_obs = env.partial_reset(
+                            np.squeeze(terminals, axis=-1))
+                        current_step[terminals] = 0
+                    current_ob = next_obs
+                child_pipe.send((
+                    train_rews, epoch_reward, time.perf_counter() - start))
+            elif command == 'close':
+                break
+    finally:
+        env.close()
+        child_pipe.close()
+
+
+class VecRolloutCollector(VecOnPolicyCollector):
+    """
+    On policy collector whose worker processes run the policy themselves
+        each of proc_nums workers builds env_func(*env_args) (a vec env
+        with its share of the envs) and a shared cpu copy of pf / vf,
+        rolls out a whole epoch and writes it into shared memory arrays
+        of the replay buffer, so nothing is sent per step
+        env / eval_env are only used for evaluation and spaces, so a
+        single env is enough, the total env count is replay_buffer.env_nums
+    Obs / return normalization statistics would be local to every worker,
+    so workers' envs can not use obs_norm / rew_norm
+    """
+    def __init__(self, vf, env_func, env_args, proc_nums=4,
+                 start_method='spawn', seed=0, **kwargs):
+        super().__init__(vf, **kwargs)
+        env_param = env_args[1] if len(env_args) > 1 else None
+        if isinstance(env_param, dict):
+            assert not env_param.get("obs_norm", False) and \
+                "rew_norm" not in env_param, \
+                "obs_norm / rew_norm would be normalized per worker"
+        self.env_nums = self.replay_buffer.env_nums
+        assert self.env_nums % proc_nums == 0
+        self.sample_epoch_frames = self.epoch_frames // self.env_nums
+        assert self.sample_epoch_frames == \
+            self.replay_buffer._max_replay_buffer_size, \
+            "epoch_frames should fill the on policy buffer"
+        self.proc_nums = proc_nums
+        self.env_nums_per_proc = self.env_nums // proc_nums
+
+        self.shared_funcs = copy.deepcopy(self.funcs)
+        for func in self.shared_funcs.values():
+            func.to("cpu")
+            func.share_memory()
+
+        self.ctx = mp.get_context(start_method)
+        self.shared_arrays = self._allocate_buffer()
+        self._rollout_time = 0
+        self._worker_time = 0
+
+        self.parent_pipes = []
+        self.workers = []
+        for rank in range(proc_nums):
+            parent_pipe, child_pipe = self.ctx.Pipe()
+            env_slice = slice(rank * self.env_nums_per_proc,
+                              (rank + 1) * self.env_nums_per_proc)
+            p = self.ctx.Process(
+                target=rollout_worker,
+                args=(child_pipe, env_func, env_args,
+                      self.shared_funcs, self.shared_arrays, env_slice,
+                      self.sample_epoch_frames, self.max_episode_frames,
+                      self.discount, seed + rank),
+                daemon=True)
+            p.start()
+            child_pipe.close()
+            self.parent_pipes.append(parent_pipe)
+            self.workers.append(p)
+
+    def _allocate_buffer(self):
+        """
+        Shared memory arrays for the buffer keys, shapes and dtypes follow
+        what VecOnPolicyCollector would add to the buffer, the learner env
+        only gives the per env shapes
+        """
+        ob_tensor = obs_to_tensor(self.current_ob[:1], self.device)
+        with torch.no_grad():
+            acts = self.pf.explore(ob_tensor)["action"].cpu().numpy()
+        acts = np.repeat(acts, self.env_nums, axis=0)
+        obs = np.repeat(self.current_ob[:1], self.env_nums, axis=0)
+        flags = np.zeros((self.env_nums, 1))
+        example = {
+            "obs": obs,
+            "next_obs": obs,
+            "acts": acts,
+            "values": flags,
+            "rewards": flags,
+            "terminals": flags,
+            "time_limits": flags
+        }
+        shared_arrays = {}
+        for key in BUFFER_KEYS:
+            dtype = np.uint8 if np.asarray(example[key]).dtype == np.uint8 \
+                else np.float64
+            shape = (self.replay_buffer._max_replay_buffer_size,) + \
+                np.shape(example[key])
+            raw = self.ctx.RawArray(
+                'B', int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shared_arrays[key] = (raw, dtype, shape)
+            setattr(self.replay_buffer, "_" + key,
+                    shared_view(shared_arrays[key]))
+        return shared_arrays
+
+    def train_one_epoch(self):
+        start = time.perf_counter()
+        for key, func in self.funcs.items():
+            self.shared_funcs[key].load_state_dict(func.state_dict())
+
+        with self.profiler.span("rollout"):
+            for parent_pipe in self.parent_pipes:
+                parent_pipe.send('rollout')
+            train_rews = []
+            train_epoch_reward = 0
+            worker_time = 0
+            for parent_pipe in self.parent_pipes:
+                rews, epoch_reward, compute_time = parent_pipe.recv()
+                train_rews += rews
+                train_epoch_reward += epoch_reward
+                worker_time = max(worker_time, compute_time)
+
+        self.replay_buffer._top = 0
+        self.replay_buffer._size = self.replay_buffer._max_replay_buffer_size
+        self._rollout_time += time.perf_counter() - start
+        self._worker_time += worker_time
+        return {
+            'train_rewards': train_rews,
+            'train_epoch_reward': train_epoch_reward
+        }
+
+    def stats(self):
+        stats = super().stats()
+        stats["rollout_time"] = self._rollout_time
+        stats["rollout_sync_time"] = max(
+            self._rollout_time - self._worker_time, 0)
+        self._rollout_time = 0
+        self._worker_time = 0
+        return stats
+
+    def terminate(self):
+        for parent_pipe in self.parent_pipes:
+            parent_pipe.send('close')
+        for p in self.workers:
+            p.join()
+        super().terminate()
@@ -1,5 +1,11 @@
 from .get_env import get_env
+from .get_env import make_env
 from .get_env import get_vec_env
 from .get_env import get_subprocvec_env
 from .vecenv import VecEnv
-from .subproc_vecenv import SubProcVecEnv
\ No newline at end of file
+from .subproc_vecenv import SubProcVecEnv
+from .synthetic import SyntheticContinuousEnv
+from .synthetic import SyntheticPixelEnv
+from .synthetic import make_synthetic_env
+from .vec_wrapper import VecAtariPreprocess, VecNormRet, VecRewardShift
+from .fused_wrapper import FusedWrapper
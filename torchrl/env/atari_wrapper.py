@@ -1,6 +1,5 @@
 import gym
 import numpy as np
-import cv2
 from collections import deque
 
 from .base_wrapper import BaseWrapper
@@ -130,6 +129,41 @@ class MaxAndSkipEnv(BaseWrapper):
         return self.env.reset(**kwargs)
 
 
+class SkipFrames(BaseWrapper):
+    def __init__(self, env, skip=4):
+        """
+        Like MaxAndSkipEnv but return the last two raw frames as a
+        (2, H, W, C) array, max pooling is left to VecAtariPreprocess
+        which processes the frames of all envs at once
+        """
+        super().__init__(env)
+        self._obs_buffer = np.zeros(
+            (2,)+env.observation_space.shape, dtype=np.uint8)
+        self._skip = skip
+        self.observation_space = gym.spaces.Box(
+            low=0, high=255, shape=self._obs_buffer.shape, dtype=np.uint8)
+
+    def step(self, action):
+        total_reward = 0.0
+        done = None
+        for i in range(self._skip):
+            obs, reward, done, info = self.env.step(action)
+            if i == self._skip - 2:
+                self._obs_buffer[0] = obs
+            if i == self._skip - 1:
+                self._obs_buffer[1] = obs
+            total_reward += reward
+            if done:
+                break
+        return self._obs_buffer.copy(), total_reward, done, info
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+        self._obs_buffer[0] = obs
+        self._obs_buffer[1] = obs
+        return self._obs_buffer.copy()
+
+
 class ClipRewardEnv(gym.RewardWrapper, BaseWrapper):
     def __init__(self, env):
         super().__init__(env)
@@ -185,6 +219,9 @@ class WarpFrame(gym.ObservationWrapper, BaseWrapper):
                 dtype=np.uint8)
 
     def observation(self, frame):
+        # cv2 is slow to import, only load it when atari envs are used,
+        # later imports are a sys.modules lookup
+        import cv2
         if self.grayscale:
             frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
         frame = cv2.resize(
@@ -227,6 +264,54 @@ class FrameStack(BaseWrapper):
         return LazyFrames(list(self.frames))
 
 
+class RingFrameStack(BaseWrapper):
+    def __init__(self, env, k, window=64):
+        """Stack k last frames in a preallocated rolling array.
+        Observations are views of the array, no per step concatenation,
+        they stay valid for window - k steps (a reset counts as k steps),
+        copy them to keep longer
+        (VecEnv and replay buffers copy observations, but
+        MemoryEfficientReplayBuffer keeps references and should use
+        FrameStack instead)
+        """
+        super().__init__(env)
+        # a reset must not overwrite the previous observation
+        assert window >= 2 * k, "window should be at least 2 * k"
+        self.k = k
+        shp = env.observation_space.shape
+        self._buffer = np.zeros(
+            (window + k - 1,) + shp, dtype=env.observation_space.dtype)
+        self._pos = k
+        self.observation_space = gym.spaces.Box(
+            low=0, high=255, shape=((shp[0] * k,) + shp[1:]),
+            dtype=env.observation_space.dtype)
+
+    def reset(self):
+        ob = self.env.reset()
+        # write after the current window, the last observation
+        # (e.g. the terminal one) stays valid
+        for _ in range(self.k):
+            self._push(ob)
+        return self._get_ob()
+
+    def step(self, action):
+        ob, reward, done, info = self.env.step(action)
+        self._push(ob)
+        return self._get_ob(), reward, done, info
+
+    def _push(self, ob):
+        if self._pos == len(self._buffer):
+            # move the last k - 1 frames to the front
+            self._buffer[:self.k - 1] = self._buffer[self._pos - self.k + 1:]
+            self._pos = self.k - 1
+        self._buffer[self._pos] = ob
+        self._pos += 1
+
+    def _get_ob(self):
+        return self._buffer[self._pos - self.k: self._pos].reshape(
+            self.observation_space.shape)
+
+
 class ScaledFloatFrame(gym.ObservationWrapper, BaseWrapper):
     def __init__(self, env):
         super().__init__(env)
@@ -28,6 +28,19 @@ class BaseWrapper(gym.Wrapper):
     def copy_state(self, source_env):
         pass
 
+    def get_state(self):
+        """
+        Statistics kept by wrappers (normalizers...) for resuming,
+        each wrapper adds its own entries to the state of the inner wrapper
+        """
+        if hasattr(self._wrapped_env, "get_state"):
+            return self._wrapped_env.get_state()
+        return {}
+
+    def set_state(self, state):
+        if hasattr(self._wrapped_env, "set_state"):
+            self._wrapped_env.set_state(state)
+
 
 class RewardShift(gym.RewardWrapper, BaseWrapper):
     def __init__(self, env, reward_scale=1):
@@ -72,6 +85,15 @@ class Normalizer():
     def stop_update_estimate(self):
         self.should_estimate = False
 
+    def copy_from(self, source):
+        """
+        Copy the statistics of source in place, envs sharing this
+        normalizer (eval envs) keep tracking it
+        """
+        self._mean = copy.deepcopy(source._mean)
+        self._var = copy.deepcopy(source._var)
+        self._count = source._count
+
     def update_estimate(self, data):
         if not self.should_estimate:
             return
@@ -115,6 +137,15 @@ class NormObs(gym.ObservationWrapper, BaseWrapper):
         self._obs_var = copy.deepcopy(source_env._obs_var)
         self._obs_mean = copy.deepcopy(source_env._obs_mean)
 
+    def get_state(self):
+        state = super().get_state()
+        state["obs_normalizer"] = copy.deepcopy(self._obs_normalizer)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self._obs_normalizer.copy_from(state["obs_normalizer"])
+
     def observation(self, observation):
         if self.training:
             self._obs_normalizer.update_estimate(observation)
@@ -146,6 +177,15 @@ class NormRet(BaseWrapper):
         self.ret = 0
         return self.env.reset(**kwargs)
 
+    def get_state(self):
+        state = super().get_state()
+        state["ret_rms"] = (self.ret_mean, self.ret_var, self.count)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.ret_mean, self.ret_var, self.count = state["ret_rms"]
+
 
 # Check Trajectory is ended by time limit or not
 class TimeLimitAugment(BaseWrapper):
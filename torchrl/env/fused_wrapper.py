@@ -0,0 +1,90 @@
+import gym
+import copy
+import numpy as np
+
+from .base_wrapper import BaseWrapper, Normalizer, update_mean_var_count
+
+
+class FusedWrapper(BaseWrapper):
+    """
+    TimeLimitAugment / NormRet / RewardShift / NormObs / NormAct
+    of non pixel envs in a single step
+        constants of the action rescaling are precomputed and the
+        wrapped gym env is one attribute lookup away
+        state (get_state / _obs_normalizer / _reward_scale) is the same
+        as the one of the separate wrappers
+    """
+    def __init__(self, env, reward_scale=1, obs_norm=False, rew_norm=None):
+        super(FusedWrapper, self).__init__(env)
+        self._time_limit = \
+            str(env.__class__.__name__).find('TimeLimit') >= 0
+
+        self._act_low = None
+        if isinstance(env.action_space, gym.spaces.Box):
+            ub = np.ones(env.action_space.shape)
+            self.action_space = gym.spaces.Box(-1 * ub, ub)
+            self.lb = env.action_space.low
+            self.ub = env.action_space.high
+            # lb + (action + 1) * 0.5 * (ub - lb) = offset + action * scale
+            self._act_scale = 0.5 * (self.ub - self.lb)
+            self._act_low = self.lb + self._act_scale
+
+        self._reward_scale = reward_scale
+        self._obs_normalizer = Normalizer(env.observation_space.shape) \
+            if obs_norm else None
+
+        self._rew_norm = rew_norm is not None
+        if self._rew_norm:
+            self.ret = 0
+            self.count = 1e-4
+            self.ret_mean = 0
+            self.ret_var = 1
+            self.discount = rew_norm.get("discount", 0.99)
+            self.epsilon = rew_norm.get("epsilon", 1e-4)
+
+    def _observation(self, obs):
+        if self._obs_normalizer is None:
+            return obs
+        if self.training:
+            self._obs_normalizer.update_estimate(obs)
+        return self._obs_normalizer.filt(obs)
+
+    def step(self, action):
+        if self._act_low is not None:
+            action = np.clip(
+                self._act_low + action * self._act_scale, self.lb, self.ub)
+        obs, rew, done, info = self.env.step(action)
+        if self._time_limit:
+            info['time_limit'] = done \
+                and self.env._max_episode_steps == self.env._elapsed_steps
+        if self.training:
+            if self._rew_norm:
+                self.ret = self.ret * self.discount + rew
+                self.ret_mean, self.ret_var, self.count = \
+                    update_mean_var_count(
+                        self.ret_mean, self.ret_var, self.count,
+                        self.ret, 0, 1)
+                rew = rew / np.sqrt(self.ret_var + self.epsilon)
+                self.ret *= (1 - done)
+            rew = self._reward_scale * rew
+        return self._observation(obs), rew, done, info
+
+    def reset(self, **kwargs):
+        if self._rew_norm:
+            self.ret = 0
+        return self._observation(self.env.reset(**kwargs))
+
+    def get_state(self):
+        state = super().get_state()
+        if self._rew_norm:
+            state["ret_rms"] = (self.ret_mean, self.ret_var, self.count)
+        if self._obs_normalizer is not None:
+            state["obs_normalizer"] = copy.deepcopy(self._obs_normalizer)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        if self._rew_norm:
+            self.ret_mean, self.ret_var, self.count = state["ret_rms"]
+        if self._obs_normalizer is not None:
+            self._obs_normalizer.copy_from(state["obs_normalizer"])
@@ -3,9 +3,13 @@ from .continuous_wrapper import *
 from .base_wrapper import *
 from .vecenv import VecEnv
 from .subproc_vecenv import SubProcVecEnv
+from .vec_wrapper import VecAtariPreprocess, VecNormRet, VecRewardShift
+from .fused_wrapper import FusedWrapper
+from .synthetic import SYNTHETIC_ENVS, make_synthetic_env
 
 
-def wrap_deepmind(env, frame_stack=False, scale=False, clip_rewards=False):
+def wrap_deepmind(env, frame_stack=False, scale=False, clip_rewards=False,
+                  ring_frame_stack=False):
     assert 'NoFrameskip' in env.spec.id
     env = EpisodicLifeEnv(env)
     env = NoopResetEnv(env, noop_max=30)
@@ -18,10 +22,56 @@ def wrap_deepmind(env, frame_stack=False, scale=False, clip_rewards=False):
     if clip_rewards:
         env = ClipRewardEnv(env)
     if frame_stack:
-        env = FrameStack(env, 4)
+        if ring_frame_stack:
+            env = RingFrameStack(env, 4)
+        else:
+            env = FrameStack(env, 4)
     return env
 
 
+def wrap_deepmind_raw(env, clip_rewards=False, **kwargs):
+    """
+    wrap_deepmind without the frame processing, which is done for all envs
+    at once by VecAtariPreprocess
+    """
+    assert 'NoFrameskip' in env.spec.id
+    env = EpisodicLifeEnv(env)
+    env = NoopResetEnv(env, noop_max=30)
+    env = SkipFrames(env, skip=4)
+    if 'FIRE' in env.unwrapped.get_action_meanings():
+        env = FireResetEnv(env)
+    if clip_rewards:
+        env = ClipRewardEnv(env)
+    return env
+
+
+def wrap_vec_preprocess(vec_env, env_param):
+    return VecAtariPreprocess(
+        vec_env,
+        frame_stack=4 if env_param.get("frame_stack", False) else 1,
+        scale=env_param.get("scale", False))
+
+
+def single_env_param(env_param):
+    """
+    Params of the envs inside vec envs, rewards are normalized / scaled
+    once for all envs by wrap_vec_rewards
+    """
+    env_param = dict(env_param)
+    env_param.pop("reward_scale", None)
+    env_param.pop("rew_norm", None)
+    return env_param
+
+
+def wrap_vec_rewards(vec_env, env_param):
+    if "rew_norm" in env_param:
+        vec_env = VecNormRet(vec_env, **env_param["rew_norm"])
+    # scaling by 1 is skipped to keep the plain vec env
+    if env_param.get("reward_scale", 1) != 1:
+        vec_env = VecRewardShift(vec_env, env_param["reward_scale"])
+    return vec_env
+
+
 def wrap_continuous_env(env, obs_norm, reward_scale):
     env = RewardShift(env, reward_scale)
     if obs_norm:
@@ -29,8 +79,30 @@ def wrap_continuous_env(env, obs_norm, reward_scale):
     return env
 
 
+# env params handled by FusedWrapper
+FUSED_WRAPPER_PARAMS = ("reward_scale", "obs_norm", "rew_norm")
+
+
+def make_env(env_id, synthetic_param=None):
+    """
+    synthetic_param: kwargs for synthetic envs, ignored by other envs
+    """
+    if env_id in SYNTHETIC_ENVS:
+        return make_synthetic_env(env_id, **(synthetic_param or {}))
+    return gym.make(env_id)
+
+
 def get_env(env_id, env_param):
-    env = gym.make(env_id)
+    env_param = dict(env_param)
+    env = make_env(env_id, env_param.pop("synthetic", None))
+    # single envs always process their own frames
+    env_param.pop("vec_preprocess", None)
+    if env_param.pop("fuse_wrappers", False) and \
+            len(env.observation_space.shape) != 3:
+        # other keys (obs_alpha, frame_stack...) do not apply to it
+        return FusedWrapper(env, **{
+            key: env_param[key] for key in FUSED_WRAPPER_PARAMS
+            if key in env_param})
     if str(env.__class__.__name__).find('TimeLimit') >= 0:
         env = TimeLimitAugment(env)
     env = BaseWrapper(env)
@@ -50,14 +122,23 @@ def get_env(env_id, env_param):
 
 
 def get_single_env(env_id, env_param):
-    env = gym.make(env_id)
+    env_param = dict(env_param)
+    env = make_env(env_id, env_param.pop("synthetic", None))
+    vec_preprocess = env_param.pop("vec_preprocess", False)
+    if env_param.pop("fuse_wrappers", False) and \
+            len(env.observation_space.shape) != 3:
+        return FusedWrapper(
+            env, reward_scale=env_param.get("reward_scale", 1))
     if str(env.__class__.__name__).find('TimeLimit') >= 0:
         env = TimeLimitAugment(env)
     env = BaseWrapper(env)
 
     ob_space = env.observation_space
     if len(ob_space.shape) == 3:
-        env = wrap_deepmind(env, **env_param)
+        if vec_preprocess:
+            env = wrap_deepmind_raw(env, **env_param)
+        else:
+            env = wrap_deepmind(env, **env_param)
 
     if "reward_scale" in env_param:
         env = RewardShift(env, env_param["reward_scale"])
@@ -67,21 +148,38 @@ def get_single_env(env_id, env_param):
     return env
 
 
-def get_vec_env(env_id, env_param, vec_env_nums):
+def get_vec_env(env_id, env_param, vec_env_nums, **kwargs):
+    """
+    kwargs: info_fields / extra_infos of VecEnv
+    """
     vec_env = VecEnv(
         vec_env_nums, get_single_env,
-        [env_id, env_param])
+        [env_id, single_env_param(env_param)], **kwargs)
 
+    if env_param.get("vec_preprocess", False):
+        vec_env = wrap_vec_preprocess(vec_env, env_param)
     if "obs_norm" in env_param and env_param["obs_norm"]:
         vec_env = NormObs(vec_env)
-    return vec_env
-
-
-def get_subprocvec_env(env_id, env_param, vec_env_nums, proc_nums):
+    return wrap_vec_rewards(vec_env, env_param)
+
+
+def get_subprocvec_env(env_id, env_param, vec_env_nums, proc_nums,
+                       **kwargs):
+    """
+    kwargs: start_method / preload / auto_reset / info_fields /
+        extra_infos of SubProcVecEnv
+    """
+    # vec wrappers do not see the resets done inside step
+    assert not kwargs.get("auto_reset", False) or not (
+        env_param.get("vec_preprocess", False) or
+        env_param.get("obs_norm", False)), \
+        "auto_reset can not be used with vec_preprocess / obs_norm"
     vec_env = SubProcVecEnv(
         proc_nums, vec_env_nums, get_single_env,
-        [env_id, env_param])
+        [env_id, single_env_param(env_param)], **kwargs)
 
+    if env_param.get("vec_preprocess", False):
+        vec_env = wrap_vec_preprocess(vec_env, env_param)
     if "obs_norm" in env_param and env_param["obs_norm"]:
         vec_env = NormObs(vec_env)
-    return vec_env
+    return wrap_vec_rewards(vec_env, env_param)
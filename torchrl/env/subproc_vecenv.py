@@ -1,14 +1,38 @@
+import time
 import numpy as np
-from .vecenv import VecEnv
+from .vecenv import VecEnv, step_repeat, step_sequence, pack_infos
+from torchrl.utils.metrics import get_rss
 import multiprocessing as mp
-from toolz.dicttoolz import merge_with
 
 
-mp.set_start_method('spawn', force=True)
+# modules imported once by the forkserver, workers forked from it
+# start with them already loaded
+FORKSERVER_PRELOAD = ["numpy", "gym", "torch", "torchrl.env.get_env"]
+
+
+def auto_reset_step(env, action):
+    """
+    step, envs are reset at episode ends and their first observation
+    is returned besides the terminal one
+    """
+    ob, reward, done, info = env.step(action)
+    return ob, reward, done, info, env.reset() if done else None
+
+
+def pack_step_results(results, info_fields, extra_infos):
+    """
+    Step results of the envs of a worker as (obs, rews, dones, infos[,
+    reset_obs]) with the declared infos packed into arrays,
+    the parent only concatenates the arrays of all workers
+    """
+    columns = list(zip(*results))
+    columns[3] = pack_infos(columns[3], info_fields, extra_infos)
+    return columns
 
 
 def env_worker(
-    env_funcs, env_args, child_pipe, parent_pipe
+    env_funcs, env_args, child_pipe, parent_pipe, auto_reset=False,
+    info_fields=None, extra_infos=False
 ):
     envs = [
         env_func(*env_arg) \
@@ -16,15 +40,34 @@ def env_worker(
     ]
 
     parent_pipe.close()
+    step = auto_reset_step if auto_reset else \
+        lambda env, action: env.step(action)
 
     try:
         while True:
             command, data = child_pipe.recv()
             if command == 'step':
+                start = time.perf_counter()
+                results = pack_step_results([
+                    step(env, np.squeeze(action)) for env, action in zip(envs, data)
+                ], info_fields, extra_infos)
+                child_pipe.send((results, time.perf_counter() - start))
+            elif command == 'step_repeat':
+                start = time.perf_counter()
+                actions, repeat = data
+                results = pack_step_results([
+                    step_repeat(env, np.squeeze(action), repeat)
+                    for env, action in zip(envs, actions)
+                ], info_fields, extra_infos)
+                child_pipe.send((results, time.perf_counter() - start))
+            elif command == 'step_sequence':
+                # one round trip for len(data) steps of every env
+                start = time.perf_counter()
                 results = [
-                    env.step(np.squeeze(action)) for env, action in zip(envs, data)
+                    step_sequence(env, data[:, index])
+                    for index, env in enumerate(envs)
                 ]
-                child_pipe.send(results)
+                child_pipe.send((results, time.perf_counter() - start))
             elif command == 'reset':
                 results = [env.reset(**data) for env in envs]
                 child_pipe.send(results)
@@ -41,6 +84,14 @@ def env_worker(
             elif command == 'eval':
                 for env in envs:
                     env.eval()
+            elif command == 'get_state':
+                child_pipe.send([
+                    env.get_state() if hasattr(env, "get_state") else {}
+                    for env in envs])
+            elif command == 'set_state':
+                for env, env_state in zip(envs, data):
+                    if hasattr(env, "set_state"):
+                        env.set_state(env_state)
             elif command == 'close':
                 child_pipe.close()
                 break
@@ -52,9 +103,28 @@ def env_worker(
 
 
 class SubProcVecEnv(VecEnv):
-    def __init__(self, proc_nums, env_nums, env_funcs, env_args):
+    """
+    start_method: "spawn" (default), "forkserver" or "fork"
+        spawn starts a fresh interpreter per worker, which imports
+        torch / gym / simulators again
+        forkserver forks workers from a server process with preload
+        modules imported (FORKSERVER_PRELOAD and the module of env_funcs)
+        fork is fastest but copies the parent state, only safe before
+        cuda is initialized
+    auto_reset: workers reset envs at episode ends within step, step
+        returns the first observations of the new episodes and the
+        terminal observations as infos["terminal_obs"]
+    kwargs: info_fields / extra_infos of VecEnv, workers pack the declared
+        info fields into arrays
+    """
+    def __init__(self, proc_nums, env_nums, env_funcs, env_args,
+                 start_method="spawn", preload=None, auto_reset=False,
+                 **kwargs):
         self.proc_nums = proc_nums
-        super().__init__(env_nums, env_funcs, env_args)
+        self.auto_reset = auto_reset
+        self.start_method = start_method
+        self.preload = preload
+        super().__init__(env_nums, env_funcs, env_args, **kwargs)
 
     def set_up_envs(self):
         self.example_env = self.env_funcs[0](*self.env_args[0])
@@ -64,7 +134,17 @@ class SubProcVecEnv(VecEnv):
         assert self.env_nums % self.proc_nums == 0
         self.env_nums_per_proc = self.env_nums // self.proc_nums
 
-        self.ctx = mp.get_context()
+        # context instead of changing the global start method
+        self.ctx = mp.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            preload = self.preload
+            if preload is None:
+                preload = list(FORKSERVER_PRELOAD)
+                # scripts are imported by each worker with its own argv
+                if self.env_funcs[0].__module__ != "__main__":
+                    preload.append(self.env_funcs[0].__module__)
+            # no effect once the forkserver of this process is running
+            self.ctx.set_forkserver_preload(preload)
         for i in range(self.proc_nums):
             env_idx_start = i * self.env_nums_per_proc
             env_idx_end = (i + 1) * self.env_nums_per_proc
@@ -75,7 +155,10 @@ class SubProcVecEnv(VecEnv):
                     self.env_funcs[env_idx_start: env_idx_end],
                     self.env_args[env_idx_start: env_idx_end],
                     child_pipe,
-                    parent_pipe
+                    parent_pipe,
+                    self.auto_reset,
+                    self.info_fields,
+                    self.extra_infos
                 )
             )
             p.start()
@@ -94,6 +177,8 @@ class SubProcVecEnv(VecEnv):
     def close(self):
         for parent_pipe in self.parent_pipes:
             parent_pipe.send(('close', None))
+        for worker in self.workers:
+            worker.join()
 
     def reset(self, **kwargs):
         for parent_pipe in self.parent_pipes:
@@ -107,37 +192,156 @@ class SubProcVecEnv(VecEnv):
         return self._obs
 
     def partial_reset(self, index_mask, **kwargs):
+        # only workers with envs to reset are contacted
         index_mask_per_proc = np.split(index_mask, self.proc_nums)
+        pipes = []
         for index_mask_current, parent_pipe in zip(
             index_mask_per_proc, self.parent_pipes):
-            parent_pipe.send(
-                ('partial_reset', (index_mask_current, kwargs))
-            )
+            if np.any(index_mask_current):
+                parent_pipe.send(
+                    ('partial_reset', (index_mask_current, kwargs))
+                )
+                pipes.append(parent_pipe)
 
         partial_obs = []
-        for parent_pipe in self.parent_pipes:
+        for parent_pipe in pipes:
             partial_obs += parent_pipe.recv()
-        self._obs[index_mask] = partial_obs
+        if len(partial_obs) == 0:
+            return self._obs
+        # observations returned by step are not modified
+        self._obs = self._obs.copy()
+        self._obs[index_mask.astype(np.bool_)] = partial_obs
         return self._obs
 
     def step(self, actions):
         actions = np.split(actions, self.proc_nums * self.env_nums_per_proc)
+        results = self._gather('step', [
+            actions[index * self.env_nums_per_proc:
+                    (index + 1) * self.env_nums_per_proc]
+            for index in range(self.proc_nums)])
+        self._step_count += 1
+
+        obs, rews, dones, infos, reset_obs = self._unpack(results)
+        self._obs = obs
+        if self.auto_reset:
+            infos["terminal_obs"] = obs
+            if np.any(dones):
+                self._obs = obs.copy()
+                for index, reset_ob in enumerate(reset_obs):
+                    if reset_ob is not None:
+                        self._obs[index] = reset_ob
+        return self._obs, rews, dones, infos
+
+    def _gather(self, command, worker_data):
+        """
+        Send command to all workers, returns the results of each worker
+        """
+        start = time.perf_counter()
+        for parent_pipe, data in zip(self.parent_pipes, worker_data):
+            parent_pipe.send((command, data))
+        results = []
+        compute_time = 0
+        for parent_pipe in self.parent_pipes:
+            worker_results, worker_time = parent_pipe.recv()
+            results.append(worker_results)
+            # time spent in envs, lets the parent separate IPC overhead
+            compute_time = max(compute_time, worker_time)
+        step_time = time.perf_counter() - start
+        self._step_time += step_time
+        self._ipc_time += max(step_time - compute_time, 0)
+        return results
+
+    def _unpack(self, results):
+        """
+        Step results packed by workers (see pack_step_results) as
+        obs / rewards / dones / infos / reset_obs of all envs
+        """
+        columns = list(zip(*results))
+        obs = np.stack([ob for part in columns[0] for ob in part])
+        rews = np.concatenate(columns[1])[:, np.newaxis]
+        dones = np.concatenate(columns[2])[:, np.newaxis]
+
+        infos = {}
+        for key, dtype in self.info_fields.items():
+            if all(key not in packed for packed in columns[3]):
+                continue
+            # workers whose first info misses the key did not pack it
+            parts = [packed[key] if key in packed
+                     else np.zeros(len(part), dtype=dtype)
+                     for packed, part in zip(columns[3], columns[1])]
+            if key not in self._info_arrays:
+                self._info_arrays[key] = np.empty(self.env_nums, dtype=dtype)
+            infos[key] = np.concatenate(parts, out=self._info_arrays[key])
+        extra_keys = [key for packed in columns[3] for key in packed
+                      if key not in self.info_fields]
+        for key in dict.fromkeys(extra_keys):
+            infos[key] = np.concatenate([
+                packed[key] for packed in columns[3] if key in packed])
+
+        reset_obs = None
+        if len(columns) > 4:
+            reset_obs = [ob for part in columns[4] for ob in part]
+        return obs, rews, dones, infos, reset_obs
+
+    def step_repeat(self, actions, repeat):
+        """
+        Like step but each env repeats its action repeat times in the
+        worker, rewards are summed and repetition stops at done
+        """
+        actions = np.split(actions, self.proc_nums * self.env_nums_per_proc)
+        results = self._gather('step_repeat', [
+            (actions[index * self.env_nums_per_proc:
+                     (index + 1) * self.env_nums_per_proc], repeat)
+            for index in range(self.proc_nums)])
+        self._step_count += 1
+
+        obs, rews, dones, infos, _ = self._unpack(results)
+        self._obs = obs
+        return self._obs, rews, dones, infos
+
+    def step_sequence(self, actions):
+        """
+        Run K steps with actions of shape (K, env_nums, ...) open loop,
+        each worker runs the whole sequence and replies once
+        (see VecEnv.step_sequence for returns)
+        """
+        actions = np.asarray(actions)
+        results = self._gather('step_sequence', [
+            actions[:, index * self.env_nums_per_proc:
+                    (index + 1) * self.env_nums_per_proc]
+            for index in range(self.proc_nums)])
+        self._step_count += len(actions)
+        return self._merge_sequences(
+            [result for part in results for result in part])
+
+    def get_state(self):
+        for parent_pipe in self.parent_pipes:
+            parent_pipe.send(('get_state', None))
+        states = []
+        for parent_pipe in self.parent_pipes:
+            states += parent_pipe.recv()
+        return {"envs": states}
+
+    def set_state(self, state):
         for index, parent_pipe in enumerate(self.parent_pipes):
             parent_pipe.send((
-                'step',
-                actions[
-                    index * self.env_nums_per_proc: (index +1) * self.env_nums_per_proc
-                ]
+                'set_state',
+                state["envs"][
+                    index * self.env_nums_per_proc:
+                    (index + 1) * self.env_nums_per_proc]
             ))
-        results = []
-        for parent_pipe in self.parent_pipes:
-            results += parent_pipe.recv()
 
-        obs, rews, dones, infos = zip(*results)
-        self._obs = np.stack(obs)
-        infos = merge_with(np.array, *infos)
-        return self._obs, np.stack(rews)[:, np.newaxis], \
-            np.stack(dones)[:, np.newaxis], infos   
+    def stats(self):
+        """
+        Mean step latency / IPC overhead (step latency not spent in envs)
+        since last call and RSS of worker processes
+        """
+        stats = super().stats()
+        for rank, worker in enumerate(self.workers):
+            rss = get_rss(worker.pid)
+            if rss is not None:
+                stats["worker_{}_rss_mb".format(rank)] = rss / 2 ** 20
+        return stats
 
     def seed(self, seed):
         for idx, parent_pipe in enumerate(self.parent_pipes):
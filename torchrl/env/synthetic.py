@@ -0,0 +1,189 @@
+import time
+import gym
+import numpy as np
+from gym.utils import seeding
+from gym.wrappers.time_limit import TimeLimit
+
+"""
+Synthetic envs without simulator dependencies,
+used for load testing vectorized envs / collectors / buffers
+"""
+
+
+class SyntheticEnvBase(gym.Env):
+    """
+    Simulate per-step cost of a real simulator
+        step_latency: seconds per step
+        latency_jitter: extra uniform random latency in [0, latency_jitter)
+        busy_wait: spin instead of sleep, keeps the core busy like a
+            cpu bound simulator (sleep releases the core)
+    """
+    def __init__(self, step_latency=0., latency_jitter=0., busy_wait=False):
+        self.step_latency = step_latency
+        self.latency_jitter = latency_jitter
+        self.busy_wait = busy_wait
+        self.seed()
+
+    def seed(self, seed=None):
+        self.np_random, seed = seeding.np_random(seed)
+        return [seed]
+
+    def _simulate_latency(self):
+        latency = self.step_latency
+        if self.latency_jitter > 0:
+            latency += self.np_random.uniform(0, self.latency_jitter)
+        if latency <= 0:
+            return
+        if self.busy_wait:
+            end = time.perf_counter() + latency
+            while time.perf_counter() < end:
+                pass
+        else:
+            time.sleep(latency)
+
+
+class SyntheticContinuousEnv(SyntheticEnvBase):
+    """
+    Stable linear dynamics x' = A x + B a + noise,
+    reward = - |x|^2 - ctrl_cost * |a|^2
+    A and B only depend on dynamics_seed, so every env instance
+    shares the same MDP
+    """
+    def __init__(
+            self, obs_dim=17, act_dim=6,
+            dynamics_seed=0, noise_std=0.01, ctrl_cost=0.1,
+            **kwargs):
+        rng = np.random.RandomState(dynamics_seed)
+        q, _ = np.linalg.qr(rng.randn(obs_dim, obs_dim))
+        self._A = (0.95 * q).astype(np.float32)
+        self._B = (rng.randn(obs_dim, act_dim) /
+                   np.sqrt(act_dim)).astype(np.float32)
+        self.noise_std = noise_std
+        self.ctrl_cost = ctrl_cost
+
+        self.observation_space = gym.spaces.Box(
+            low=-np.inf, high=np.inf, shape=(obs_dim,), dtype=np.float32)
+        self.action_space = gym.spaces.Box(
+            low=-1., high=1., shape=(act_dim,), dtype=np.float32)
+        self._state = np.zeros(obs_dim, dtype=np.float32)
+        super().__init__(**kwargs)
+
+    def reset(self):
+        self._state = self.np_random.uniform(
+            -0.1, 0.1, self.observation_space.shape).astype(np.float32)
+        return self._state.copy()
+
+    def step(self, action):
+        self._simulate_latency()
+        action = np.clip(action, -1., 1.).astype(np.float32)
+        noise = self.np_random.normal(
+            0, self.noise_std, self.observation_space.shape)
+        self._state = (self._A @ self._state + self._B @ action +
+                       noise).astype(np.float32)
+        reward = - float(np.sum(self._state ** 2)) - \
+            self.ctrl_cost * float(np.sum(action ** 2))
+        return self._state.copy(), reward, False, {}
+
+
+class SyntheticALE():
+    """
+    Minimal ale interface used by atari wrappers
+    """
+    def __init__(self, env):
+        self._env = env
+
+    def lives(self):
+        return self._env.lives
+
+
+class SyntheticPixelEnv(SyntheticEnvBase):
+    """
+    uint8 frames of configurable shape sampled from a fixed frame bank,
+    next frame depends on current frame and action,
+    exposes action meanings and lives like ALE envs so it could go through
+    the deepmind wrappers
+        life_loss_prob: probability of losing a life per step
+        reward_prob: probability of getting a +1 / -1 reward per step
+    """
+    def __init__(
+            self, frame_shape=(210, 160, 3), action_num=4,
+            frame_bank_size=64, lives=3,
+            life_loss_prob=0.005, reward_prob=0.02,
+            **kwargs):
+        assert action_num >= 3, "FIRE reset needs at least 3 actions"
+        frame_shape = tuple(frame_shape)
+        self.observation_space = gym.spaces.Box(
+            low=0, high=255, shape=frame_shape, dtype=np.uint8)
+        self.action_space = gym.spaces.Discrete(action_num)
+        self.frame_bank_size = frame_bank_size
+        self.start_lives = lives
+        self.life_loss_prob = life_loss_prob
+        self.reward_prob = reward_prob
+        self.ale = SyntheticALE(self)
+        self.lives = lives
+        self._frame_idx = 0
+        super().__init__(**kwargs)
+
+    def seed(self, seed=None):
+        seeds = super().seed(seed)
+        self._frames = self.np_random.randint(
+            0, 256, (self.frame_bank_size,) + self.observation_space.shape,
+            dtype=np.uint8)
+        return seeds
+
+    def get_action_meanings(self):
+        meanings = ["NOOP", "FIRE", "RIGHT", "LEFT"]
+        meanings += ["ACTION_{}".format(i)
+                     for i in range(len(meanings), self.action_space.n)]
+        return meanings[:self.action_space.n]
+
+    def reset(self):
+        self.lives = self.start_lives
+        self._frame_idx = self.np_random.randint(self.frame_bank_size)
+        return self._frames[self._frame_idx].copy()
+
+    def step(self, action):
+        self._simulate_latency()
+        self._frame_idx = (self._frame_idx * 31 + int(action) + 1) % \
+            self.frame_bank_size
+
+        reward = 0.
+        if self.np_random.rand() < self.reward_prob:
+            reward = float(self.np_random.choice([-1., 1.]))
+        if self.np_random.rand() < self.life_loss_prob:
+            self.lives -= 1
+        done = self.lives <= 0
+        return self._frames[self._frame_idx].copy(), reward, done, \
+            {"ale.lives": self.lives}
+
+
+SYNTHETIC_ENVS = {
+    "SyntheticContinuous-v0": SyntheticContinuousEnv,
+    "SyntheticPixelNoFrameskip-v0": SyntheticPixelEnv
+}
+
+SYNTHETIC_MAX_EPISODE_STEPS = {
+    "SyntheticContinuous-v0": 1000,
+    "SyntheticPixelNoFrameskip-v0": 10000
+}
+
+for env_id, env_class in SYNTHETIC_ENVS.items():
+    try:
+        gym.envs.registration.register(
+            id=env_id,
+            entry_point="{}:{}".format(__name__, env_class.__name__),
+            max_episode_steps=SYNTHETIC_MAX_EPISODE_STEPS[env_id])
+    except gym.error.Error:
+        # already registered
+        pass
+
+
+def make_synthetic_env(env_id, max_episode_steps=None, **kwargs):
+    """
+    Like gym.make but passes kwargs (latency, shapes...) to the env
+    """
+    if max_episode_steps is None:
+        max_episode_steps = SYNTHETIC_MAX_EPISODE_STEPS[env_id]
+    env = SYNTHETIC_ENVS[env_id](**kwargs)
+    env.spec = gym.spec(env_id)
+    return TimeLimit(env, max_episode_steps=max_episode_steps)
@@ -0,0 +1,170 @@
+import gym
+import numpy as np
+
+from .base_wrapper import BaseWrapper, update_mean_var_count
+
+"""
+Wrappers processing observations / rewards of all envs of a VecEnv at once
+    they run in the main process, so their statistics are shared by the
+    envs of all SubProcVecEnv workers
+"""
+
+
+# fixed point RGB -> gray coefficients (<< 14) used by cv2.cvtColor,
+# gives the same frames as WarpFrame
+GRAY_COEFFS = np.array([4899, 9617, 1868], dtype=np.uint32)
+GRAY_SHIFT = 14
+# cv2.resize handles at most 512 channels per call
+MAX_RESIZE_CHANNELS = 512
+
+
+class VecAtariPreprocess(BaseWrapper):
+    """
+    Batched version of the max pooling / WarpFrame / FrameStack / scale
+    steps of wrap_deepmind
+        Envs should be wrapped by SkipFrames (vec_preprocess in env
+        params), which returns the last two raw (H, W, C) frames,
+        max pooling, grayscale, resize and frame stacking of all envs
+        are then done by a few numpy / cv2 calls per step
+    Observations are (env_nums, k * C, height, width) uint8 arrays
+    (float32 in [-0.5, 0.5] with scale)
+    """
+    def __init__(self, env, width=84, height=84, grayscale=True,
+                 frame_stack=1, scale=False):
+        super().__init__(env)
+        self.width = width
+        self.height = height
+        self.grayscale = grayscale
+        self.k = frame_stack
+        self.scale = scale
+
+        raw_shape = env.observation_space.shape
+        assert len(raw_shape) == 4 and raw_shape[0] == 2, \
+            "envs should be wrapped by SkipFrames"
+        self.channels = 1 if grayscale else raw_shape[-1]
+        self._max_frames = np.zeros(
+            (env.env_nums,) + raw_shape[1:], dtype=np.uint8)
+        self._stacked = np.zeros(
+            (env.env_nums, self.k * self.channels, height, width),
+            dtype=np.uint8)
+
+        if scale:
+            self.observation_space = gym.spaces.Box(
+                low=-0.5, high=0.5, shape=self._stacked.shape[1:],
+                dtype=np.float32)
+        else:
+            self.observation_space = gym.spaces.Box(
+                low=0, high=255, shape=self._stacked.shape[1:],
+                dtype=np.uint8)
+
+    def _warp(self, raw_obs):
+        """
+        (N, 2, H, W, C) raw frame pairs -> (N, channels, height, width)
+        """
+        import cv2
+        frames = self._max_frames[:len(raw_obs)]
+        np.maximum(raw_obs[:, 0], raw_obs[:, 1], out=frames)
+        if self.grayscale:
+            frames = ((frames.astype(np.uint32) @ GRAY_COEFFS +
+                       (1 << (GRAY_SHIFT - 1))) >> GRAY_SHIFT).astype(
+                           np.uint8)[..., np.newaxis]
+
+        # resize all envs in one call by treating them as channels
+        n, h, w, c = frames.shape
+        frames = frames.transpose(1, 2, 0, 3).reshape(h, w, n * c)
+        resized = []
+        for start in range(0, n * c, MAX_RESIZE_CHANNELS):
+            chunk = np.ascontiguousarray(
+                frames[..., start: start + MAX_RESIZE_CHANNELS])
+            chunk = cv2.resize(
+                chunk, (self.width, self.height),
+                interpolation=cv2.INTER_AREA)
+            resized.append(chunk.reshape(self.height, self.width, -1))
+        resized = np.concatenate(resized, axis=-1)
+        return resized.reshape(self.height, self.width, n, c).transpose(
+            2, 3, 0, 1)
+
+    def _get_ob(self):
+        if self.scale:
+            return self._stacked.astype(np.float32) / 255.0 - 0.5
+        # new array every step, collectors keep the previous observation
+        return self._stacked.copy()
+
+    def reset(self, **kwargs):
+        frames = self._warp(self.env.reset(**kwargs))
+        self._stacked[:] = np.tile(frames, (1, self.k, 1, 1))
+        return self._get_ob()
+
+    def partial_reset(self, index_mask, **kwargs):
+        raw_obs = self.env.partial_reset(index_mask, **kwargs)
+        index_mask = index_mask.astype(np.bool_)
+        if not np.any(index_mask):
+            return self._get_ob()
+        frames = self._warp(raw_obs[index_mask])
+        self._stacked[index_mask] = np.tile(frames, (1, self.k, 1, 1))
+        return self._get_ob()
+
+    def step(self, actions):
+        raw_obs, rews, dones, infos = self.env.step(actions)
+        frames = self._warp(raw_obs)
+        self._stacked[:, :-self.channels] = self._stacked[:, self.channels:]
+        self._stacked[:, -self.channels:] = frames
+        return self._get_ob(), rews, dones, infos
+
+
+class VecRewardShift(BaseWrapper):
+    """
+    RewardShift for the (env_nums, 1) rewards of vec envs
+    """
+    def __init__(self, env, reward_scale=1):
+        super().__init__(env)
+        self._reward_scale = reward_scale
+
+    def step(self, actions):
+        obs, rews, dones, infos = self.env.step(actions)
+        if self.training:
+            rews = self._reward_scale * rews
+        return obs, rews, dones, infos
+
+
+class VecNormRet(BaseWrapper):
+    """
+    NormRet for vec envs, discounted returns of all envs update the
+    return statistics with one batched moment update per step
+    """
+    def __init__(self, env, discount=0.99, epsilon=1e-4):
+        super().__init__(env)
+        self.ret = np.zeros((env.env_nums, 1))
+        self.count = 1e-4
+        self.ret_mean = 0
+        self.ret_var = 1
+        self.discount = discount
+        self.epsilon = epsilon
+
+    def step(self, actions):
+        obs, rews, dones, infos = self.env.step(actions)
+        if self.training:
+            self.ret = self.ret * self.discount + rews
+            self.ret_mean, self.ret_var, self.count = update_mean_var_count(
+                self.ret_mean, self.ret_var, self.count,
+                np.mean(self.ret), np.var(self.ret), len(self.ret))
+            rews = rews / np.sqrt(self.ret_var + self.epsilon)
+            self.ret[dones] = 0
+        return obs, rews, dones, infos
+
+    def reset(self, **kwargs):
+        self.ret[:] = 0
+        return self.env.reset(**kwargs)
+
+    def partial_reset(self, index_mask, **kwargs):
+        self.ret[index_mask.astype(np.bool_)] = 0
+        return self.env.partial_reset(index_mask, **kwargs)
+
+    def get_state(self):
+        state = super().get_state()
+        state["ret_rms"] = (self.ret_mean, self.ret_var, self.count)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.ret_mean, self.ret_var, self.count = state["ret_rms"]
@@ -1,17 +1,108 @@
+import time
+import warnings
 import numpy as np
 from .base_wrapper import BaseWrapper
 from toolz.dicttoolz import merge_with
 
 
+# info fields returned by vec envs, as (env_nums,) arrays of these dtypes
+# (terminal_obs of auto reset envs is stacked like observations)
+INFO_FIELDS = {
+    "time_limit": np.bool_,
+    "ale.lives": np.int64,
+}
+
+
+# undeclared info keys already warned about
+_dropped_info_keys = set()
+
+
+def warn_dropped_infos(info, info_fields):
+    for key in info:
+        if key not in info_fields and key not in _dropped_info_keys:
+            _dropped_info_keys.add(key)
+            warnings.warn(
+                "info key '{}' is not in info_fields and is dropped, "
+                "declare it or use extra_infos=True".format(key))
+
+
+def pack_infos(infos, info_fields, extra_infos=False, out=None):
+    """
+    Declared fields of the info dicts of several envs as arrays
+        fields missing in the first info are skipped,
+        other keys are dropped, or merged by merge_with (slow) with
+        extra_infos
+        out: dict of arrays reused for declared fields
+    """
+    packed = {}
+    for key, dtype in info_fields.items():
+        if key not in infos[0]:
+            continue
+        if out is None or key not in out or len(out[key]) != len(infos):
+            array = np.empty(len(infos), dtype=dtype)
+            if out is not None:
+                out[key] = array
+        else:
+            array = out[key]
+        for index, info in enumerate(infos):
+            array[index] = info.get(key, 0)
+        packed[key] = array
+    if extra_infos:
+        packed.update(merge_with(np.array, *[
+            {key: value for key, value in info.items()
+             if key not in info_fields} for info in infos]))
+    else:
+        for info in infos:
+            warn_dropped_infos(info, info_fields)
+    return packed
+
+
+def step_repeat(env, action, repeat):
+    """
+    Repeat action up to repeat times (stop at done), rewards are summed
+    """
+    total_reward = 0.
+    for _ in range(repeat):
+        ob, reward, done, info = env.step(action)
+        total_reward += reward
+        if done:
+            break
+    return ob, total_reward, done, info
+
+
+def step_sequence(env, actions):
+    """
+    Run a sequence of actions open loop, envs are reset at episode ends
+    returns per step (next_ob, reward, done, info) and the last ob
+    """
+    results = []
+    ob = None
+    for action in actions:
+        next_ob, reward, done, info = env.step(np.squeeze(action))
+        results.append((next_ob, reward, done, info))
+        ob = next_ob
+        if done:
+            ob = env.reset()
+    return results, ob
+
+
 class VecEnv(BaseWrapper):
     """
     Vector Env
         Each env should have
         1. same observation space shape
         2. same action space shape
+    info_fields: dict of info key -> dtype returned as arrays (INFO_FIELDS
+        by default), arrays of declared fields are reused by the next step
+    extra_infos: also return other info keys, merged per step (slow)
     """
-    def __init__(self, env_nums, env_funcs, env_args):
+    def __init__(self, env_nums, env_funcs, env_args,
+                 info_fields=None, extra_infos=False):
         self.env_nums = env_nums
+        self.info_fields = INFO_FIELDS if info_fields is None \
+            else info_fields
+        self.extra_infos = extra_infos
+        self._info_arrays = {}
         self.env_funcs = env_funcs
         self.env_args = env_args
         if isinstance(env_funcs, list):
@@ -21,6 +112,9 @@ class VecEnv(BaseWrapper):
             self.env_funcs = [env_funcs for _ in range(env_nums)]
             self.env_args = [env_args for _ in range(env_nums)]
 
+        self._step_time = 0
+        self._ipc_time = 0
+        self._step_count = 0
         self.set_up_envs()
 
     def set_up_envs(self):
@@ -47,19 +141,100 @@ class VecEnv(BaseWrapper):
     def partial_reset(self, index_mask, **kwargs):
         indexs = np.argwhere(index_mask == 1).reshape((-1))
         reset_obs = [self.envs[index].reset() for index in indexs]
-        self._obs[index_mask] = reset_obs
+        if len(reset_obs) == 0:
+            return self._obs
+        # observations returned by step are not modified
+        self._obs = self._obs.copy()
+        self._obs[index_mask.astype(np.bool_)] = reset_obs
         return self._obs
 
     def step(self, actions):
+        start = time.perf_counter()
         actions = np.split(actions, self.env_nums)
         result = [env.step(np.squeeze(action)) for env, action in
                   zip(self.envs, actions)]
+        self._step_time += time.perf_counter() - start
+        self._step_count += 1
         obs, rews, dones, infos = zip(*result)
         self._obs = np.stack(obs)
-        infos = merge_with(np.array, *infos)
+        infos = pack_infos(
+            infos, self.info_fields, self.extra_infos, self._info_arrays)
         return self._obs, np.stack(rews)[:, np.newaxis], \
             np.stack(dones)[:, np.newaxis], infos
 
+    def step_repeat(self, actions, repeat):
+        """
+        Like step but each env repeats its action repeat times,
+        rewards are summed and repetition stops at done
+        """
+        start = time.perf_counter()
+        actions = np.split(actions, self.env_nums)
+        result = [step_repeat(env, np.squeeze(action), repeat)
+                  for env, action in zip(self.envs, actions)]
+        self._step_time += time.perf_counter() - start
+        self._step_count += 1
+        obs, rews, dones, infos = zip(*result)
+        self._obs = np.stack(obs)
+        infos = pack_infos(
+            infos, self.info_fields, self.extra_infos, self._info_arrays)
+        return self._obs, np.stack(rews)[:, np.newaxis], \
+            np.stack(dones)[:, np.newaxis], infos
+
+    def step_sequence(self, actions):
+        """
+        Run K steps with actions of shape (K, env_nums, ...) open loop,
+        envs are reset at episode ends (their own done only, collector
+        side max_episode_frames is not applied)
+        returns next_obs / rewards / dones of shape (K, env_nums, ...),
+        infos of each step and the observations after the last step
+        """
+        start = time.perf_counter()
+        actions = np.asarray(actions)
+        result = [
+            step_sequence(env, actions[:, index])
+            for index, env in enumerate(self.envs)]
+        self._step_time += time.perf_counter() - start
+        self._step_count += len(actions)
+        return self._merge_sequences(result)
+
+    def _merge_sequences(self, result):
+        sequences, last_obs = zip(*result)
+        next_obs, rews, dones, infos = [], [], [], []
+        for step in zip(*sequences):
+            step_obs, step_rews, step_dones, step_infos = zip(*step)
+            next_obs.append(np.stack(step_obs))
+            rews.append(np.stack(step_rews)[:, np.newaxis])
+            dones.append(np.stack(step_dones)[:, np.newaxis])
+            infos.append(pack_infos(
+                step_infos, self.info_fields, self.extra_infos))
+        self._obs = np.stack(last_obs)
+        return np.stack(next_obs), np.stack(rews), np.stack(dones), \
+            infos, self._obs
+
+    def get_state(self):
+        return {"envs": [
+            env.get_state() if hasattr(env, "get_state") else {}
+            for env in self.envs]}
+
+    def set_state(self, state):
+        for env, env_state in zip(self.envs, state["envs"]):
+            if hasattr(env, "set_state"):
+                env.set_state(env_state)
+
+    def stats(self):
+        """
+        Mean step latency since last call
+        """
+        count = max(self._step_count, 1)
+        stats = {
+            "env_step_latency_ms": 1000 * self._step_time / count,
+            "env_ipc_latency_ms": 1000 * self._ipc_time / count
+        }
+        self._step_time = 0
+        self._ipc_time = 0
+        self._step_count = 0
+        return stats
+
     def seed(self, seed):
         for idx, env in enumerate(self.envs):
             env.seed(seed * self.env_nums + idx)
@@ -1,3 +1,4 @@
+import contextlib
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -5,6 +6,36 @@ import numpy as np
 import torchrl.networks.init as init
 
 
+def precision_context(dtype, device_type):
+    """
+    autocast context for network forwards, no-op when dtype is None
+    """
+    if dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device_type, dtype=dtype)
+
+
+def set_precision(module, dtype):
+    """
+    set autocast dtype of all precision-aware submodules (None for fp32)
+    parameters are kept in fp32
+    """
+    for m in module.modules():
+        if hasattr(m, "autocast_dtype"):
+            m.autocast_dtype = dtype
+
+
+def obs_to_tensor(obs, device):
+    """
+    uint8 observations (pixels) are copied to device as uint8 and cast by
+    the network, 4x less bytes than float32, others become float32 tensors
+    """
+    obs = np.asarray(obs)
+    if obs.dtype == np.uint8:
+        return torch.from_numpy(obs).to(device)
+    return torch.Tensor(obs).to(device)
+
+
 class MLPBase(nn.Module):
     def __init__(
             self,
@@ -41,6 +72,8 @@ class MLPBase(nn.Module):
         self.seq_fcs = nn.Sequential(*self.fcs)
 
     def forward(self, x):
+        if x.dtype == torch.uint8:
+            x = x.float()
         return self.seq_fcs(x)
 
 
@@ -57,15 +90,30 @@ def calc_next_shape(input_shape, conv_info):
 
 
 class CNNBase(nn.Module):
+    autocast_dtype = None
+
     def __init__(
             self, input_shape,
             hidden_shapes,
             activation_func=nn.ReLU,
             init_func=init.basic_init,
             add_ln=False,
-            last_activation_func=None):
+            last_activation_func=None,
+            uint8_input=False,
+            channels_last=False):
+        """
+        uint8_input: inputs are raw pixels in [0, 255], scaled to
+            [-0.5, 0.5] on device (same as ScaledFloatFrame)
+        channels_last: channels_last weights / activations and inplace ReLU,
+            lets oneDNN (cpu) and cudnn pick their fastest conv kernels,
+            conv + activation are not fused here (export_actor does it)
+        """
         super().__init__()
 
+        self.uint8_input = uint8_input
+        self.channels_last = channels_last
+        # reshape target computed once instead of np.prod every forward
+        self.flat_input_shape = (-1,) + tuple(input_shape)
         current_shape = input_shape
         in_channels = input_shape[0]
         self.add_ln = add_ln
@@ -86,7 +134,10 @@ class CNNBase(nn.Module):
             init_func(conv)
 
             self.convs.append(conv)
-            self.convs.append(activation_func())
+            if channels_last and activation_func is nn.ReLU:
+                self.convs.append(nn.ReLU(inplace=True))
+            else:
+                self.convs.append(activation_func())
             in_channels = out_channels
             current_shape = calc_next_shape(current_shape, conv_info)
             if self.add_ln:
@@ -98,10 +149,18 @@ class CNNBase(nn.Module):
         self.convs.pop(-1)
         self.convs.append(self.last_activation_func())
         self.seq_convs = nn.Sequential(*self.convs)
+        if channels_last:
+            self.seq_convs.to(memory_format=torch.channels_last)
 
     def forward(self, x):
-        view_shape = x.size()[:-3] + torch.Size([-1])
-        x = x.view(torch.Size(
-            [np.prod(x.size()[:-3])]) + x.size()[-3:])
-        out = self.seq_convs(x)
-        return out.view(view_shape)
+        batch_shape = x.shape[:-3]
+        x = x.reshape(self.flat_input_shape)
+        if x.dtype == torch.uint8:
+            x = x.float()
+        if self.uint8_input:
+            x = x / 255.0 - 0.5
+        if self.channels_last:
+            x = x.contiguous(memory_format=torch.channels_last)
+        with precision_context(self.autocast_dtype, x.device.type):
+            out = self.seq_convs(x)
+        return out.float().reshape(batch_shape + (-1,))
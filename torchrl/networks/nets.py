@@ -3,6 +3,7 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import torchrl.networks.init as init
+from .base import precision_context
 
 
 class ZeroNet(nn.Module):
@@ -11,6 +12,8 @@ class ZeroNet(nn.Module):
 
 
 class Net(nn.Module):
+    autocast_dtype = None
+
     def __init__(
             self,
             output_shape,
@@ -47,9 +50,10 @@ class Net(nn.Module):
         self.seq_append_fcs = nn.Sequential(*self.append_fcs)
 
     def forward(self, x):
-        out = self.base(x)
-        out = self.seq_append_fcs(out)
-        return out
+        with precision_context(self.autocast_dtype, x.device.type):
+            out = self.base(x)
+            out = self.seq_append_fcs(out)
+        return out.float()
 
 
 class FlattenNet(Net):
@@ -63,12 +67,19 @@ class QNet(Net):
         assert len(input) == 2, "Q Net only get observation and action"
         state, action = input
         x = torch.cat([state, action], dim=-1)
-        out = self.base(x)
-        out = self.seq_append_fcs(out)
-        return out
+        with precision_context(self.autocast_dtype, x.device.type):
+            out = self.base(x)
+            out = self.seq_append_fcs(out)
+        return out.float()
 
 
 class BootstrappedNet(nn.Module):
+    """
+    Parameters of all heads are stacked along the first dimension,
+    all requested heads are evaluated by batched matmuls in one pass
+    """
+    autocast_dtype = None
+
     def __init__(
             self,
             output_shape,
@@ -82,43 +93,83 @@ class BootstrappedNet(nn.Module):
         super().__init__()
         self.base = base_type(
             activation_func=activation_func,
-            add_ln=add_ln
+            add_ln=add_ln,
             **kwargs)
         self.add_ln = add_ln
         self.activation_func = activation_func
+        self.head_activation = activation_func()
+        self.head_num = head_num
 
-        self.bootstrapped_heads = []
+        self.head_weights = nn.ParameterList()
+        self.head_biases = nn.ParameterList()
+        self.head_ln_weights = nn.ParameterList()
+        self.head_ln_biases = nn.ParameterList()
 
         append_input_shape = self.base.output_shape
+        for next_shape in append_hidden_shapes:
+            self._append_head_layer(
+                append_input_shape, next_shape, append_hidden_init_func)
+            if self.add_ln:
+                self.head_ln_weights.append(
+                    nn.Parameter(torch.ones(head_num, 1, next_shape)))
+                self.head_ln_biases.append(
+                    nn.Parameter(torch.zeros(head_num, 1, next_shape)))
+            append_input_shape = next_shape
 
-        for idx in range(head_num):
-            append_input_shape = self.base.output_shape
-            append_fcs = []
-            for next_shape in append_hidden_shapes:
-                fc = nn.Linear(append_input_shape, next_shape)
-                append_hidden_init_func(fc)
-                append_fcs.append(fc)
-                append_fcs.append(self.activation_func())
-                if self.add_ln:
-                    append_fcs.append(nn.LayerNorm(next_shape))
-                # set attr for pytorch to track parameters( device )
-                append_input_shape = next_shape
-
-            last = nn.Linear(append_input_shape, output_shape)
-            net_last_init_func(last)
-            append_fcs.append(last)
-            head = nn.Sequential(*append_fcs)
-            self.__setattr__(
-                "head{}".format(idx),
-                head)
-            self.bootstrapped_heads.append(head)
+        self._append_head_layer(
+            append_input_shape, output_shape, net_last_init_func)
+
+    def _append_head_layer(self, input_shape, output_shape, init_func):
+        # init each head like a nn.Linear, then stack
+        weights = []
+        biases = []
+        for _ in range(self.head_num):
+            fc = nn.Linear(input_shape, output_shape)
+            init_func(fc)
+            weights.append(fc.weight.data.t())
+            biases.append(fc.bias.data.unsqueeze(0))
+        # head_num x input_shape x output_shape
+        self.head_weights.append(nn.Parameter(torch.stack(weights)))
+        # head_num x 1 x output_shape
+        self.head_biases.append(nn.Parameter(torch.stack(biases)))
 
     def forward(self, x, head_idxs):
-        output = []
-        feature = self.base(x)
-        for idx in head_idxs:
-            output.append(self.bootstrapped_heads[idx](feature))
-        return output
+        """
+        Returns tensor of shape: len(head_idxs) x batch_shape x output_shape
+        """
+        head_idxs = list(head_idxs)
+        with precision_context(self.autocast_dtype, x.device.type):
+            feature = self.base(x)
+            batch_shape = feature.shape[:-1]
+            out = feature.reshape(-1, feature.shape[-1])
+
+            idx = None
+            if head_idxs != list(range(self.head_num)):
+                idx = torch.as_tensor(head_idxs, device=feature.device)
+
+            layer_num = len(self.head_weights)
+            for i in range(layer_num):
+                weight = self.head_weights[i]
+                bias = self.head_biases[i]
+                if idx is not None:
+                    weight = weight[idx]
+                    bias = bias[idx]
+                out = torch.matmul(out, weight) + bias
+                if i == layer_num - 1:
+                    break
+                out = self.head_activation(out)
+                if self.add_ln:
+                    ln_weight = self.head_ln_weights[i]
+                    ln_bias = self.head_ln_biases[i]
+                    if idx is not None:
+                        ln_weight = ln_weight[idx]
+                        ln_bias = ln_bias[idx]
+                    out = F.layer_norm(out, out.shape[-1:]) * \
+                        ln_weight + ln_bias
+
+        out = out.reshape(
+            (out.shape[0],) + batch_shape + out.shape[-1:])
+        return out.float()
 
 
 class FlattenBootstrappedNet(BootstrappedNet):
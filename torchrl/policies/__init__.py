@@ -1,3 +1,4 @@
 from .continuous_policy import *
 from .discrete_policies import *
-from .distribution import *
\ No newline at end of file
+from .distribution import *
+from .inference import *
@@ -74,6 +74,13 @@ class EpsilonGreedyDQNDiscretePolicy():
     def to(self, device):
         self.qf.to(device)
 
+    def state_dict(self):
+        return {"count": self.count, "epsilon": self.epsilon}
+
+    def load_state_dict(self, state):
+        self.count = state["count"]
+        self.epsilon = state["epsilon"]
+
 
 class EpsilonGreedyQRDQNDiscretePolicy(EpsilonGreedyDQNDiscretePolicy):
     """
@@ -106,6 +113,12 @@ class BootstrappedDQNDiscretePolicy():
     def set_head(self, idx):
         self.idx = idx
 
+    def state_dict(self):
+        return {"idx": self.idx}
+
+    def load_state_dict(self, state):
+        self.idx = state["idx"]
+
     def explore(self, x):
         output = self.qf(x, [self.idx])
         action = output[0].max(dim=-1)[1].detach().item()
@@ -116,7 +129,7 @@ class BootstrappedDQNDiscretePolicy():
 
     def eval_act(self, x):
         output = self.qf(x, range(self.head_num))
-        output = torch.mean(torch.cat(output, dim=0), dim=0)
+        output = torch.mean(output, dim=0)
         action = output.max(dim=-1)[1].detach().item()
         return action
 
@@ -1,4 +1,6 @@
+import math
 import torch
+import torch.nn.functional as F
 from torch.distributions import Distribution, Normal
 
 
@@ -10,7 +12,9 @@ class TanhNormal(Distribution):
         X ~ tanh(Z)
         Z ~ N(mean, std)
 
-    Note: this is not very numerically stable.
+    log_prob uses log(1 - tanh(z)^2) = 2 * (log(2) - z - softplus(-2z))
+    and is evaluated in fp32, so it stays finite for saturated actions
+    and under bf16 autocast.
     """
     def __init__(self, normal_mean, normal_std, epsilon=1e-6):
         """
@@ -37,12 +41,15 @@ class TanhNormal(Distribution):
         :return:
         """
         if pre_tanh_value is None:
+            value = value.float().clamp(
+                -1 + self.epsilon, 1 - self.epsilon)
             pre_tanh_value = torch.log(
                 (1+value) / (1-value)
             ) / 2
-        return self.normal.log_prob(pre_tanh_value) - torch.log(
-            1 - value * value + self.epsilon
-        )
+        pre_tanh_value = pre_tanh_value.float()
+        log_det = 2 * (
+            math.log(2) - pre_tanh_value - F.softplus(-2 * pre_tanh_value))
+        return self.normal.log_prob(pre_tanh_value) - log_det
 
     def sample(self, return_pretanh_value=False):
         """
@@ -0,0 +1,108 @@
+import copy
+import torch
+import torch.nn as nn
+from .continuous_policy import GuassianContPolicyBase
+from .discrete_policies import EpsilonGreedyDQNDiscretePolicy
+from .discrete_policies import EpsilonGreedyQRDQNDiscretePolicy
+from .discrete_policies import BootstrappedDQNDiscretePolicy
+
+
+class DeterministicActor(nn.Module):
+    """
+    Observation -> deterministic action, same action as pf.eval_act
+    Only keeps the modules needed for acting
+    """
+    def __init__(self, pf):
+        super().__init__()
+        self.tanh_action = getattr(pf, "tanh_action", False)
+        if isinstance(pf, EpsilonGreedyQRDQNDiscretePolicy):
+            self.net = pf.qf
+            self.mode = "quantile"
+            self.action_shape = pf.action_shape
+            self.quantile_num = pf.quantile_num
+        elif isinstance(pf, EpsilonGreedyDQNDiscretePolicy):
+            self.net = pf.qf
+            self.mode = "q"
+        elif isinstance(pf, BootstrappedDQNDiscretePolicy):
+            self.net = pf.qf
+            self.mode = "bootstrapped"
+            self.head_num = pf.head_num
+        elif isinstance(pf, GuassianContPolicyBase):
+            self.net = pf
+            self.mode = "guassian"
+        elif pf.continuous:
+            self.net = pf
+            self.mode = "deterministic"
+        else:
+            self.net = pf
+            self.mode = "categorical"
+
+    def forward(self, x):
+        if self.mode == "guassian":
+            mean, _, _ = self.net(x)
+            if self.tanh_action:
+                mean = torch.tanh(mean)
+            return mean
+        if self.mode == "deterministic":
+            return self.net(x)
+        if self.mode == "bootstrapped":
+            output = self.net(x, range(self.head_num))
+            output = output.mean(dim=0)
+        elif self.mode == "quantile":
+            output = self.net(x)
+            output = output.view(
+                -1, self.action_shape, self.quantile_num).mean(dim=-1)
+        else:
+            output = self.net(x)
+        return output.max(dim=-1)[1]
+
+
+def export_actor(pf, input_shape, path, quantize=False):
+    """
+    Export a frozen TorchScript actor for rollout / evaluation workers
+    Linear(+activation) and Conv(+activation) pairs are fused by
+    torch.jit.optimize_for_inference, quantize=True applies dynamic int8
+    quantization to nn.Linear layers (MLPBase / fc heads on CNNBase)
+    Traced with a batch of one observation, path=None only returns it
+    """
+    actor = DeterministicActor(copy.deepcopy(pf)).cpu().eval()
+    for param in actor.parameters():
+        param.requires_grad_(False)
+
+    if quantize:
+        actor = torch.quantization.quantize_dynamic(
+            actor, {nn.Linear}, dtype=torch.qint8)
+
+    example_input = torch.zeros((1,) + tuple(input_shape))
+    with torch.no_grad():
+        traced = torch.jit.trace(actor, example_input)
+    traced = torch.jit.freeze(traced)
+    if not quantize:
+        traced = torch.jit.optimize_for_inference(traced)
+    if path is not None:
+        torch.jit.save(traced, path)
+    return traced
+
+
+class InferenceActor():
+    """
+    Wrapper over exported actor, exposes eval_act like other policies
+    so it could be used directly by collectors
+    """
+    def __init__(self, actor, device='cpu'):
+        self.actor = actor
+        self.device = device
+
+    def eval_act(self, x):
+        with torch.no_grad():
+            action = self.actor(x.to(self.device))
+        return action.squeeze(0).cpu().numpy()
+
+    def to(self, device):
+        self.actor.to(device)
+        self.device = device
+
+
+def load_actor(path, device='cpu'):
+    actor = torch.jit.load(path, map_location=device)
+    return InferenceActor(actor, device)
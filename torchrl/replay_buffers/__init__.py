@@ -1,3 +1,4 @@
 from .base import BaseReplayBuffer
 from .memory_efficient_replay_buffer import MemoryEfficientReplayBuffer
+from .frame_stack_replay_buffer import FrameStackReplayBuffer
 from .on_policy import OnPolicyReplayBuffer
@@ -1,3 +1,4 @@
+import copy
 import numpy as np
 
 
@@ -21,10 +22,14 @@ class BaseReplayBuffer():
             if not hasattr(self, "_" + key):
                 # do not add env_nums dimension here,
                 # since it's included in data itself
+                # pixels are kept as uint8, everything else as float
+                dtype = np.uint8 \
+                    if np.asarray(sample_dict[key]).dtype == np.uint8 \
+                    else np.float64
                 self.__setattr__(
                     "_" + key,
                     np.zeros((self._max_replay_buffer_size,) +
-                             np.shape(sample_dict[key])))
+                             np.shape(sample_dict[key]), dtype=dtype))
             self.__getattribute__("_" + key)[self._top, ...] = sample_dict[key]
         self._advance()
 
@@ -52,3 +57,34 @@ class BaseReplayBuffer():
 
     def num_steps_can_sample(self):
         return self._size
+
+    def state_dict(self):
+        state = {}
+        for key, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                state[key] = value.copy()
+            elif isinstance(value, list):
+                state[key] = list(value)
+            else:
+                state[key] = copy.deepcopy(value)
+        return state
+
+    def load_state_dict(self, state):
+        for key, value in state.items():
+            current = getattr(self, key, None)
+            if isinstance(current, np.ndarray) and \
+                    current.shape == np.shape(value):
+                # keep (shared memory) arrays allocated by the buffer
+                current[...] = value
+            else:
+                setattr(self, key, value)
+
+    def fill_ratio(self):
+        return self.num_steps_can_sample() / self._max_replay_buffer_size
+
+    def memory_footprint(self):
+        """
+        Bytes allocated for stored samples
+        """
+        return sum(value.nbytes for value in vars(self).values()
+                   if isinstance(value, np.ndarray))
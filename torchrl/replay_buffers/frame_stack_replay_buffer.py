@@ -0,0 +1,98 @@
+import numpy as np
+from .base import BaseReplayBuffer
+
+
+class FrameStackReplayBuffer(BaseReplayBuffer):
+    """
+    Store each frame of stacked observations once
+        obs / next_obs are (env_nums, frame_stack * C, H, W) stacks,
+        only the newest frame of each is stored and stacks are rebuilt
+        from the frames of previous steps when sampling
+        a step starts a new episode when its obs is not the next_obs of
+        the previous step, frames before it are replaced by its first
+        frame (same as FrameStack after reset)
+    """
+    def __init__(self, max_replay_buffer_size, frame_stack=4, **kwargs):
+        super().__init__(max_replay_buffer_size, **kwargs)
+        self.frame_stack = frame_stack
+        self._last_next_obs = None
+
+    def add_sample(self, sample_dict, **kwargs):
+        sample_dict = dict(sample_dict)
+        obs = np.asarray(sample_dict.pop("obs"))
+        next_obs = np.asarray(sample_dict.pop("next_obs"))
+        channels = obs.shape[1] // self.frame_stack
+        if not hasattr(self, "_frames"):
+            frame_shape = (self._max_replay_buffer_size, self.env_nums,
+                           channels) + obs.shape[2:]
+            self._frames = np.zeros(frame_shape, dtype=obs.dtype)
+            self._next_frames = np.zeros(frame_shape, dtype=obs.dtype)
+            self._episode_start = np.zeros(
+                (self._max_replay_buffer_size, self.env_nums),
+                dtype=np.bool_)
+
+        if self._last_next_obs is None:
+            episode_start = np.ones(self.env_nums, dtype=np.bool_)
+        else:
+            episode_start = np.any(
+                (obs != self._last_next_obs).reshape(self.env_nums, -1),
+                axis=-1)
+        self._episode_start[self._top] = episode_start
+        self._frames[self._top] = obs[:, -channels:]
+        self._next_frames[self._top] = next_obs[:, -channels:]
+        self._last_next_obs = next_obs.copy()
+        super().add_sample(sample_dict, **kwargs)
+
+    def num_steps_can_sample(self):
+        if self._size == self._max_replay_buffer_size:
+            # oldest steps need frames which are already overwritten
+            return self._size - (self.frame_stack - 1)
+        return self._size
+
+    def _stack_frames(self, indices):
+        """
+        (batch, env_nums, frame_stack, C, H, W) obs stacks of steps indices
+        """
+        env_idx = np.arange(self.env_nums)
+        current = np.repeat(indices[:, np.newaxis], self.env_nums, axis=1)
+        stacked = np.empty(
+            (len(indices), self.env_nums, self.frame_stack) +
+            self._frames.shape[2:], dtype=self._frames.dtype)
+        stacked[:, :, -1] = self._frames[current, env_idx]
+        for offset in range(2, self.frame_stack + 1):
+            # stay at the first step of the episode
+            move = ~self._episode_start[current, env_idx]
+            current = np.where(
+                move, (current - 1) % self._max_replay_buffer_size, current)
+            stacked[:, :, -offset] = self._frames[current, env_idx]
+        return stacked
+
+    def random_batch(self, batch_size, sample_key):
+        assert batch_size % self.env_nums == 0, \
+            "batch size should be dividable by env_nums"
+        batch_size //= self.env_nums
+        size = self.num_steps_can_sample()
+        indices = np.random.randint(0, size, batch_size)
+        if self._size == self._max_replay_buffer_size:
+            indices = (self._top + self.frame_stack - 1 + indices) % \
+                self._max_replay_buffer_size
+
+        return_dict = {}
+        obs = None
+        if "obs" in sample_key or "next_obs" in sample_key:
+            obs = self._stack_frames(indices)
+        for key in sample_key:
+            if key == "obs":
+                data = obs
+            elif key == "next_obs":
+                data = np.concatenate([
+                    obs[:, :, 1:],
+                    self._next_frames[indices][:, :, np.newaxis]], axis=2)
+            else:
+                data = self.__getattribute__("_"+key)[indices]
+            data_shape = (batch_size * self.env_nums,) + data.shape[2:]
+            if key in ["obs", "next_obs"]:
+                data_shape = (batch_size * self.env_nums, -1) + \
+                    data.shape[4:]
+            return_dict[key] = data.reshape(data_shape)
+        return return_dict
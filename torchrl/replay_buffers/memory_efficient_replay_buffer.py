@@ -17,12 +17,32 @@ class MemoryEfficientReplayBuffer(BaseReplayBuffer):
             self.__getattribute__("_" + key)[self._top] = sample_dict[key]
         self._advance()
 
+    def memory_footprint(self):
+        """
+        Estimated bytes referenced by stored samples,
+        consecutive LazyFrames share all frames but the newest one
+        """
+        total = 0
+        for value in vars(self).values():
+            if not isinstance(value, list) or self._size == 0:
+                continue
+            sample = value[(self._top - 1) % self._max_replay_buffer_size]
+            frames = getattr(sample, "_frames", None)
+            if frames is not None:
+                # LazyFrames not forced yet
+                sample_bytes = np.asarray(frames[-1]).nbytes
+            else:
+                sample_bytes = np.asarray(sample).nbytes
+            total += sample_bytes * self._size
+        return total
+
     def encode_batchs(self, key, batch_indices):
         pointer = self.__getattribute__("_"+key)
         data = []
         for idx in batch_indices:
             data.append(pointer[idx])
-        return np.array(data, dtype=np.float)
+        # keep the dtype of stored frames (uint8)
+        return np.array(data)
 
     def random_batch(self, batch_size, sample_key):
         indices = np.random.randint(0, self._size, batch_size)
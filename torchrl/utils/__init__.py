@@ -1,3 +1,8 @@
-from .args import get_args
-from .args import get_params
-from .logger import Logger
+from .lazy import lazy_attrs
+
+__getattr__, __dir__ = lazy_attrs(__name__, {
+    "get_args": ".args",
+    "get_params": ".args",
+    "Logger": ".logger",
+    "Profiler": ".profiler"
+})
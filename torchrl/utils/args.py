@@ -15,6 +15,10 @@ def get_args():
     parser.add_argument('--proc_nums', type=int, default=4,
                         help='vec env nums')
 
+    parser.add_argument('--start_method', type=str, default='spawn',
+                        choices=['spawn', 'forkserver', 'fork'],
+                        help='start method of env worker processes')
+
     parser.add_argument('--eval_worker_nums', type=int, default=2,
                         help='eval worker nums')
 
@@ -33,9 +37,27 @@ def get_args():
     parser.add_argument('--overwrite', action='store_true', default=False,
                         help='overwrite previous experiments')
 
+    parser.add_argument('--quiet', action='store_true', default=False,
+                        help='do not print epoch info tables')
+
+    parser.add_argument('--auto_reset', action='store_true', default=False,
+                        help='env workers reset finished episodes '
+                             'within step')
+
+    parser.add_argument('--rollout_workers', action='store_true',
+                        default=False,
+                        help='on policy workers run the policy and write '
+                             'whole epochs into the buffer')
+
+    parser.add_argument('--resume', action='store_true', default=False,
+                        help='resume training from the latest checkpoint')
+
     parser.add_argument("--device", type=int, default=0,
                         help="gpu secification",)
 
+    parser.add_argument('--prometheus', action='store_true', default=False,
+                        help='export epoch metrics as prometheus text file')
+
     # tensorboard
     parser.add_argument("--id", type=str,   default=None,
                         help="id for tensorboard",)
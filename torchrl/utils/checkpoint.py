@@ -0,0 +1,182 @@
+import os
+import os.path as osp
+import pickle
+import hashlib
+import shutil
+import threading
+from collections import OrderedDict, deque
+import torch
+
+
+def to_cpu(state):
+    """
+    Copy of (nested) state dict with all tensors copied to cpu memory,
+    later in-place updates of the parameters do not affect the copy
+    """
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    if isinstance(state, dict):
+        return state.__class__(
+            (key, to_cpu(value)) for key, value in state.items())
+    if isinstance(state, (list, tuple)):
+        return state.__class__(to_cpu(value) for value in state)
+    return state
+
+
+def state_digest(state):
+    """
+    Checksum of a tensor state dict (network state_dict),
+    None for other states, which are never deduplicated
+    """
+    if not isinstance(state, dict) or len(state) == 0 or \
+            not all(isinstance(v, torch.Tensor) for v in state.values()):
+        return None
+    digest = hashlib.sha1()
+    for key, tensor in state.items():
+        digest.update("{}:{}:{};".format(
+            key, tensor.dtype, tuple(tensor.shape)).encode())
+        digest.update(tensor.detach().cpu().contiguous().reshape(-1).view(
+            torch.uint8).numpy().tobytes())
+    return digest.hexdigest()
+
+
+class CheckpointWriter():
+    """
+    Write snapshots on a background thread
+        save() copies the state to cpu memory and returns immediately
+        files are written to a temp file then renamed, so a crash never
+        leaves a partially written checkpoint
+        a network state dict identical (same checksum) to the last one
+        written for the same key is hard linked instead of written again,
+        only the checksum of written states is kept
+        snapshots of the same tag still waiting to be written are
+        replaced by the newer one (e.g. "best" improving every epoch)
+        keep_last: only keep files of the last keep_last numbered
+        snapshots, named snapshots ("best", "finish") are always kept
+    Files ending with .pkl are pickled, others are written by torch.save,
+    a callable state is called with the temp path to write the file itself
+    (e.g. exporting an actor)
+    """
+    def __init__(self, keep_last=None, async_write=True):
+        self.keep_last = keep_last
+        self.async_write = async_write
+
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+        self.writing = False
+        self.closed = False
+        self.error = None
+
+        self.last_written = {}
+        self.numbered = deque()
+
+        self.thread = None
+        if self.async_write:
+            self.thread = threading.Thread(
+                target=self._run, name="CheckpointWriter", daemon=True)
+            self.thread.start()
+
+    def save(self, tag, files):
+        """
+        tag: epoch number or snapshot name
+        files: dict of key -> (path, state), key identifies the same
+            object across snapshots (e.g. network name)
+        """
+        self._raise_error()
+        job = (tag, OrderedDict(
+            (key, (path, to_cpu(state)))
+            for key, (path, state) in files.items()))
+        if not self.async_write:
+            self._write(job)
+            return
+        with self.condition:
+            # coalesce with a pending snapshot of the same tag
+            self.pending.pop(tag, None)
+            self.pending[tag] = job
+            self.condition.notify_all()
+
+    def flush(self):
+        """
+        Block until all pending snapshots are written
+        """
+        if self.async_write:
+            with self.condition:
+                while len(self.pending) > 0 or self.writing:
+                    self.condition.wait()
+        self._raise_error()
+
+    def close(self):
+        if self.async_write and not self.closed:
+            self.flush()
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+            self.thread.join()
+        self.closed = True
+        self._raise_error()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("checkpoint writing failed") from error
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while len(self.pending) == 0 and not self.closed:
+                    self.condition.wait()
+                if len(self.pending) == 0:
+                    return
+                _, job = self.pending.popitem(last=False)
+                self.writing = True
+            try:
+                self._write(job)
+            except Exception as e:
+                self.error = e
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def _write(self, job):
+        tag, files = job
+        paths = []
+        for key, (path, state) in files.items():
+            tmp_path = path + ".tmp"
+            digest = None if callable(state) else state_digest(state)
+            if callable(state):
+                state(tmp_path)
+            elif not self._link_duplicate(key, digest, tmp_path):
+                if path.endswith(".pkl"):
+                    with open(tmp_path, "wb") as f:
+                        pickle.dump(state, f)
+                else:
+                    torch.save(state, tmp_path)
+            os.replace(tmp_path, path)
+            if digest is not None:
+                self.last_written[key] = (path, digest)
+            else:
+                self.last_written.pop(key, None)
+            paths.append(path)
+
+        if isinstance(tag, int):
+            self.numbered.append(paths)
+            if self.keep_last is not None:
+                while len(self.numbered) > self.keep_last:
+                    for path in self.numbered.popleft():
+                        if osp.exists(path):
+                            os.remove(path)
+
+    def _link_duplicate(self, key, digest, tmp_path):
+        if digest is None or key not in self.last_written:
+            return False
+        last_path, last_digest = self.last_written[key]
+        if not osp.exists(last_path) or digest != last_digest:
+            return False
+        if osp.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(last_path, tmp_path)
+        except OSError:
+            shutil.copyfile(last_path, tmp_path)
+        return True
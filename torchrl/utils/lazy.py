@@ -0,0 +1,25 @@
+import importlib
+import sys
+
+
+def lazy_attrs(package, attrs):
+    """
+    Module level __getattr__ / __dir__ (PEP 562) importing attributes of a
+    package on first access, so that importing a package does not import
+    every submodule (and their heavy dependencies)
+        attrs: dict of attribute name -> submodule relative to package
+    """
+    def __getattr__(name):
+        if name not in attrs:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(package, name))
+        module = importlib.import_module(attrs[name], package)
+        value = getattr(module, name)
+        # cache, later accesses do not go through __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(attrs))
+
+    return __getattr__, __dir__
@@ -0,0 +1,111 @@
+import csv
+import os
+import numpy as np
+from collections import OrderedDict
+
+"""
+Columnar experiment logs
+    log.npz in each run directory holds one float64 array per logged key,
+    loading a run is a single read instead of parsing csv rows
+"""
+
+
+class ColumnStore():
+    """
+    Append rows of scalars, columns missing in a row are filled with nan
+    """
+    def __init__(self, path):
+        self.path = path
+        self.columns = OrderedDict()
+        self.rows = 0
+        if os.path.exists(path):
+            for key, value in load_npz(path).items():
+                self.columns[key] = list(value)
+            self.rows = max(
+                [len(value) for value in self.columns.values()] + [0])
+
+    def append(self, row):
+        for key, value in row.items():
+            if key not in self.columns:
+                self.columns[key] = [np.nan] * self.rows
+            self.columns[key].append(float(value))
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(np.nan)
+
+    def truncate(self, key, max_value):
+        """
+        Keep only the rows whose key column is <= max_value
+        """
+        if key not in self.columns:
+            return
+        keep = [i for i, value in enumerate(self.columns[key])
+                if value <= max_value]
+        for column_key, column in self.columns.items():
+            self.columns[column_key] = [column[i] for i in keep]
+        self.rows = len(keep)
+        self.write()
+
+    def write(self):
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, **{
+            key: np.asarray(value, dtype=np.float64)
+            for key, value in self.columns.items()})
+        os.replace(tmp_path, self.path)
+
+
+def load_npz(path):
+    with np.load(path) as data:
+        return OrderedDict((key, data[key]) for key in data.files)
+
+
+def load_csv(path):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        titles = next(reader, [])
+        rows = [row + [''] * (len(titles) - len(row)) for row in reader]
+    values = np.array(
+        [[float(v) if v != '' else np.nan for v in row] for row in rows],
+        dtype=np.float64).reshape(len(rows), len(titles))
+    return OrderedDict(
+        (title, values[:, i]) for i, title in enumerate(titles))
+
+
+def load_run(run_dir):
+    """
+    Columns of one run, from log.npz or log.csv of older runs
+    """
+    npz_path = os.path.join(run_dir, 'log.npz')
+    if os.path.exists(npz_path):
+        return load_npz(npz_path)
+    return load_csv(os.path.join(run_dir, 'log.csv'))
+
+
+def load_runs(log_dir, exp_id, env_name, seeds,
+              entry, x_key="Total Frames"):
+    """
+    entry of all seeds of an experiment as (x, values),
+    values is a (seeds, steps) array truncated to the shortest run
+    """
+    runs = [load_run(os.path.join(log_dir, exp_id, env_name, str(seed)))
+            for seed in seeds]
+    length = min(len(run[entry]) for run in runs)
+    shortest = min(runs, key=lambda run: len(run[entry]))
+    values = np.stack([run[entry][:length] for run in runs])
+    return shortest[x_key][:length], values
+
+
+def smooth(array, window=10):
+    """
+    Forward moving average along the last axis,
+    mean of array[..., i:i+window] (shorter windows at the end)
+    """
+    array = np.asarray(array, dtype=np.float64)
+    length = array.shape[-1]
+    cumsum = np.concatenate([
+        np.zeros(array.shape[:-1] + (1,)),
+        np.cumsum(array, axis=-1)], axis=-1)
+    start = np.arange(length)
+    end = np.minimum(start + window, length)
+    return (cumsum[..., end] - cumsum[..., start]) / (end - start)
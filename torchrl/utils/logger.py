@@ -1,15 +1,62 @@
-import tensorboardX
 import logging
 import shutil
 import os
 import numpy as np
-from tabulate import tabulate
 import sys
 import json
 import csv
+import atexit
+import queue
+import threading
+from collections import OrderedDict
+from .metrics import write_prometheus
+from .log_store import ColumnStore
+
+
+class ScalarWriter():
+    """
+    Write tensorboard scalars from a background thread,
+    scalars of an epoch are queued as one batch
+    """
+    def __init__(self, tf_writer):
+        self.tf_writer = tf_writer
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(
+            target=self._run, name="ScalarWriter", daemon=True)
+        self.thread.start()
+
+    def add_scalars(self, scalars, step):
+        self.queue.put((scalars, step))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            scalars, step = item
+            for tag, value in scalars:
+                self.tf_writer.add_scalar(tag, value, step)
+            if self.queue.empty():
+                self.tf_writer.flush()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        self.tf_writer.close()
 
 
 class Logger():
+    """
+    Epoch infos are written to tensorboard, log.csv and stdout
+        flush_every: csv rows are buffered and written every flush_every
+            epochs (and on close)
+        async_tensorboard: write tensorboard scalars in a background thread
+        quiet: do not print the info table every epoch
+    Keys appearing after the first epoch extend the csv header, the file is
+    rewritten with the union header and missing values left empty
+    The same rows are kept as columns in log.npz for fast loading
+    (see log_store)
+    """
     def __init__(
             self,
             experiment_id,
@@ -17,7 +64,12 @@ class Logger():
             seed,
             params,
             log_dir = "./log",
-            overwrite=False):
+            overwrite=False,
+            prometheus=False,
+            resume=False,
+            flush_every=10,
+            async_tensorboard=True,
+            quiet=False):
 
         self.logger = logging.getLogger("{}_{}_{}".format(experiment_id,env_name,str(seed)))
 
@@ -33,12 +85,30 @@ class Logger():
 
         work_dir = os.path.join(log_dir, experiment_id, env_name, str(seed))
         self.work_dir = work_dir
-        if os.path.exists(work_dir):
+        # resumed runs keep logging to the existing experiment
+        if os.path.exists(work_dir) and not resume:
             assert overwrite, "Experiment Exists and Did not set overwrite"
             shutil.rmtree(work_dir)
+        # tensorboardX and tabulate are only imported by the main process
+        import tensorboardX
         self.tf_writer = tensorboardX.SummaryWriter(work_dir)
+        self.scalar_writer = ScalarWriter(self.tf_writer) \
+            if async_tensorboard else None
 
         self.csv_file_path = os.path.join(work_dir, 'log.csv')
+        self.csv_titles = self._read_csv_titles()
+        self.csv_file = open(self.csv_file_path, 'a', newline='')
+        self.csv_rows = []
+        self.column_store = ColumnStore(os.path.join(work_dir, 'log.npz'))
+        self.flush_every = flush_every
+        self.quiet = quiet
+        self.closed = False
+
+        # Prometheus text file for node exporter textfile collector
+        self.prometheus_path = os.path.join(work_dir, 'metrics.prom') \
+            if prometheus else None
+        self.prometheus_labels = {
+            "experiment": experiment_id, "env": env_name, "seed": seed}
 
         self.update_count = 0
         self.stored_infos = {}
@@ -50,6 +120,13 @@ class Logger():
         self.logger.info(
             json.dumps(params, indent = 2 )
         )
+        atexit.register(self.close)
+
+    def _read_csv_titles(self):
+        if not os.path.exists(self.csv_file_path):
+            return []
+        with open(self.csv_file_path, newline='') as f:
+            return next(csv.reader(f), [])
 
     def log(self, info):
         self.logger.info(info)
@@ -63,52 +140,133 @@ class Logger():
         self.update_count += 1
 
     def add_epoch_info(self, epoch_num, total_frames, total_time, infos, csv_write=True):
-        if csv_write:
-            if epoch_num == 0:
-                csv_titles = ["EPOCH", "Time Consumed", "Total Frames"]
-            csv_values = [epoch_num, total_time, total_frames]
-
         self.logger.info("EPOCH:{}".format(epoch_num))
         self.logger.info("Time Consumed:{}s".format(total_time))
         self.logger.info("Total Frames:{}s".format(total_frames))
 
-        tabulate_list = [["Name", "Value"]]
+        values = OrderedDict()
+        values["EPOCH"] = epoch_num
+        values["Time Consumed"] = total_time
+        values["Total Frames"] = total_frames
 
+        tabulate_list = [["Name", "Value"]]
+        scalars = []
         for info in infos:
-            self.tf_writer.add_scalar(info, infos[info], total_frames)
+            scalars.append((info, infos[info]))
+            values[info] = infos[info]
             tabulate_list.append([info, "{:.5f}".format( infos[info])])
-            if csv_write:
-                if epoch_num == 0:
-                    csv_titles += [info]
-                csv_values += ["{:.5f}".format(infos[info])]
 
         tabulate_list.append([])
-    
-        method_list = [np.mean, np.std, np.max, np.min]
+
         name_list = ["Mean", "Std", "Max", "Min"]
         tabulate_list.append(["Name"] + name_list)
 
         for info in self.stored_infos:
-
+            stored = np.asarray(self.stored_infos[info], dtype=np.float64)
+            processed_infos = [
+                stored.mean(), stored.std(), stored.max(), stored.min()]
             temp_list = [info]
-            for name, method in zip( name_list, method_list ):
-                processed_info = method(self.stored_infos[info])
-                self.tf_writer.add_scalar( "{}_{}".format(info, name),
-                    processed_info,total_frames)
+            for name, processed_info in zip(name_list, processed_infos):
+                scalars.append(("{}_{}".format(info, name), processed_info))
+                values["{}_{}".format(info, name)] = processed_info
                 temp_list.append( "{:.5f}".format(processed_info))
-                if csv_write:
-                    if epoch_num == 0:
-                        csv_titles += ["{}_{}".format(info, name)]
-                    csv_values += ["{:.5f}".format(processed_info)]
 
             tabulate_list.append(temp_list)
         #clear
         self.stored_infos = {}
+
+        if self.scalar_writer is not None:
+            self.scalar_writer.add_scalars(scalars, total_frames)
+        else:
+            for tag, value in scalars:
+                self.tf_writer.add_scalar(tag, value, total_frames)
+
         if csv_write:
-            with open(self.csv_file_path, 'a') as f:
-                self.csv_writer = csv.writer(f)
-                if epoch_num == 0:
-                    self.csv_writer.writerow(csv_titles)
-                self.csv_writer.writerow(csv_values)
+            self.column_store.append(values)
+            self._add_csv_row(values)
+
+        if self.prometheus_path is not None:
+            prometheus_metrics = OrderedDict([
+                ("epoch", epoch_num),
+                ("total_frames", total_frames),
+                ("epoch_time", total_time)
+            ] + list(values.items())[3:])
+            write_prometheus(
+                self.prometheus_path, prometheus_metrics,
+                self.prometheus_labels)
+
+        if not self.quiet:
+            from tabulate import tabulate
+            print(tabulate(tabulate_list))
+
+    def _add_csv_row(self, values):
+        row = OrderedDict()
+        for index, (key, value) in enumerate(values.items()):
+            # epoch, time and frames are written as is
+            row[key] = value if index < 3 else "{:.5f}".format(value)
+        new_titles = [key for key in row if key not in self.csv_titles]
+        if len(new_titles) > 0:
+            self.flush()
+            self._extend_csv_titles(new_titles)
+        self.csv_rows.append(row)
+        if len(self.csv_rows) >= self.flush_every:
+            self.flush()
+
+    def _extend_csv_titles(self, new_titles):
+        """
+        Rewrite log.csv with the union header,
+        values missing in previous rows are left empty
+        """
+        self.csv_file.close()
+        with open(self.csv_file_path, newline='') as f:
+            rows = list(csv.DictReader(f)) if len(self.csv_titles) > 0 \
+                else []
+        self.csv_titles = self.csv_titles + new_titles
+        tmp_path = self.csv_file_path + ".tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, self.csv_titles, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, self.csv_file_path)
+        self.csv_file = open(self.csv_file_path, 'a', newline='')
+
+    def truncate(self, epoch):
+        """
+        Drop logged rows after epoch, rows logged after the checkpoint
+        a run resumes from would otherwise be repeated
+        """
+        self.flush()
+        self.column_store.truncate("EPOCH", epoch)
+        if len(self.csv_titles) == 0:
+            return
+        self.csv_file.close()
+        with open(self.csv_file_path, newline='') as f:
+            rows = [row for row in csv.DictReader(f)
+                    if float(row["EPOCH"]) <= epoch]
+        tmp_path = self.csv_file_path + ".tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, self.csv_titles, restval="")
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, self.csv_file_path)
+        self.csv_file = open(self.csv_file_path, 'a', newline='')
+
+    def flush(self):
+        if len(self.csv_rows) > 0:
+            writer = csv.DictWriter(
+                self.csv_file, self.csv_titles, restval="")
+            writer.writerows(self.csv_rows)
+            self.csv_rows = []
+            self.column_store.write()
+        self.csv_file.flush()
 
-        print(tabulate(tabulate_list))
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.csv_file.close()
+        if self.scalar_writer is not None:
+            self.scalar_writer.close()
+        else:
+            self.tf_writer.close()
@@ -0,0 +1,69 @@
+import os
+import re
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def get_rss(pid=None):
+    """
+    Resident set size in bytes of process pid (current process by default),
+    None if it could not be read
+    """
+    pid = os.getpid() if pid is None else pid
+    try:
+        if psutil is not None:
+            return psutil.Process(pid).memory_info().rss
+        with open("/proc/{}/statm".format(pid)) as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def nbytes(data):
+    """
+    Bytes held by numpy arrays / tensors in (nested) dicts and lists
+    """
+    if isinstance(data, dict):
+        return sum(nbytes(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return sum(nbytes(value) for value in data)
+    if hasattr(data, "nbytes"):
+        return data.nbytes
+    if hasattr(data, "element_size"):
+        return data.element_size() * data.nelement()
+    return 0
+
+
+def prometheus_name(name, prefix="torchrl"):
+    name = re.sub(r"[^a-zA-Z0-9_]", "_", name).strip("_").lower()
+    return "{}_{}".format(prefix, name)
+
+
+def write_prometheus(path, metrics, labels=None, prefix="torchrl"):
+    """
+    Write metrics in Prometheus text exposition format (for node exporter
+    textfile collector), replaced atomically so scrapers never see a
+    partial file
+    """
+    label_str = ""
+    if labels:
+        label_str = "{" + ",".join(
+            '{}="{}"'.format(key, value)
+            for key, value in labels.items()) + "}"
+
+    lines = []
+    for name, value in metrics.items():
+        if value is None or not np.isscalar(value):
+            continue
+        metric_name = prometheus_name(name, prefix)
+        lines.append("# TYPE {} gauge".format(metric_name))
+        lines.append("{}{} {}".format(metric_name, label_str, float(value)))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
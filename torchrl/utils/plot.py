@@ -6,11 +6,8 @@ import matplotlib.pyplot as plt
 import sys
 import os
 from collections import OrderedDict
-import tensorflow as tf
 import argparse
 
-from tensorflow.python.summary.summary_iterator import summary_iterator
-
 def get_args():
     parser = argparse.ArgumentParser(description='RL')
     
@@ -49,6 +46,21 @@ def get_name(path):
     print(path)
     return os.path.join( path, os.listdir(path)[0] )
 
+def read_tensorboard(path, entry):
+    """
+    (steps, values) of entry in the event file under path,
+    tensorflow is only imported when tensorboard logs are read
+    """
+    from tensorflow.python.summary.summary_iterator import summary_iterator
+    steps = []
+    values = []
+    for e in summary_iterator(get_name(path)):
+        for v in e.summary.value:
+            if v.tag == entry:
+                values.append(v.simple_value)
+                steps.append(e.step)
+    return steps, values
+
 def post_process(array):
     smoth_para = 10
     new_array = []
@@ -72,13 +84,8 @@ for eachcolor, eachlinestyle, exp_name in zip(colors, linestyles_choose, args.id
     for seed in args.seed:
         file_path = os.path.join( env_name , str(seed) )
 
-        all_scores[seed] = []
-        temp_step_number = []
-        for e in summary_iterator( get_name( os.path.join( args.log_dir, exp_name, file_path ) ) ):
-            for v in e.summary.value:
-                if v.tag == args.entry:
-                    all_scores[seed].append( v.simple_value)
-                    temp_step_number.append( e.step )
+        temp_step_number, all_scores[seed] = read_tensorboard(
+            os.path.join(args.log_dir, exp_name, file_path), args.entry)
 
         if temp_step_number[-1] < min_step_number:
             min_step_number = temp_step_number[-1]
@@ -1,13 +1,11 @@
-import time
-import pickle
 import numpy as np
 import matplotlib.pyplot as plt
 import sys
 import os
 import argparse
 import seaborn as sns
-import csv
-from collections import OrderedDict
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from torchrl.utils.log_store import load_runs, smooth
 
 
 sns.set("paper")
@@ -41,22 +39,6 @@ env_name = args.env_name
 env_id = args.id
 
 
-def get_name(path):
-    print(path)
-    return os.path.join( path, os.listdir(path)[0] )
-
-
-def post_process(array):
-    smoth_para = 10
-    new_array = []
-    for i in range(len(array)):
-        if i < len(array) - smoth_para:
-            new_array.append(np.mean(array[i:i+smoth_para]))
-        else:
-            new_array.append(np.mean(array[i:None]))
-    return new_array    
-
-
 plt.figure()
 plt.figure(figsize=(10,7))
 
@@ -69,50 +51,15 @@ linestyles_choose = [
 
 for eachcolor, eachlinestyle, exp_name in zip(
         colors, linestyles_choose, args.id):
-    min_step_number = 1000000000000
-    step_number = []
-    all_scores = {}
-
-    for seed in args.seed:
-        file_path = os.path.join(
-            args.log_dir, exp_name, env_name, str(seed), 'log.csv')
-
-        all_scores[seed] = []
-        temp_step_number = []
-
-        with open(file_path,'r') as f:
-            csv_reader = csv.DictReader(f)
-
-            for row in csv_reader:
-                all_scores[seed].append(float(row[args.entry]))
-                temp_step_number.append(int(row["Total Frames"]))
-
-        if temp_step_number[-1] < min_step_number:
-            min_step_number = temp_step_number[-1]
-            step_number = temp_step_number 
-
-    all_mean = []
-    all_upper = []
-    all_lower = []
-
-    step_number = np.array(step_number) / 1e6
-    final_step = []
-    for i in range(len(step_number)):
-        # if step_number[i] <= 30:
-        final_step.append(step_number[i])
-        temp_list = []
-        for key, valueList in all_scores.items():
-            try: 
-                temp_list.append(valueList[i])
-            except Exception:
-                print(i)
-
-        all_mean.append(np.mean(temp_list))
-        all_upper.append(np.mean(temp_list) + np.std(temp_list))
-        all_lower.append(np.mean(temp_list) - np.std(temp_list))
-    all_mean = post_process(all_mean)
-    all_lower = post_process(all_lower)
-    all_upper = post_process(all_upper)
+    step_number, all_scores = load_runs(
+        args.log_dir, exp_name, env_name, args.seed, args.entry)
+    final_step = step_number / 1e6
+
+    mean = all_scores.mean(axis=0)
+    std = all_scores.std(axis=0)
+    all_mean = smooth(mean)
+    all_lower = smooth(mean - std)
+    all_upper = smooth(mean + std)
 
     plt.plot(
         final_step, all_mean,
@@ -0,0 +1,152 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import torch
+
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+class Span():
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.synchronize()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.synchronize()
+        self.profiler.record(self.name, self.start, time.perf_counter())
+
+
+class Profiler():
+    """
+    Hot path timing with nested spans
+        with profiler.span("env_step"):
+            ...
+    Disabled profiler returns a shared null context from span,
+    so instrumented code only pays for a method call
+    Per-epoch totals could be logged as "Profile/<name>" infos,
+    recorded spans could be exported as Chrome trace json
+    (chrome://tracing or https://ui.perfetto.dev)
+        max_events: cap of stored trace events, totals are still
+            accumulated after the cap is reached
+        cuda_sync: synchronize cuda at span boundaries so that
+            asynchronous kernels are charged to the right span
+    """
+    def __init__(self, enabled=False, max_events=1000000, cuda_sync=False):
+        self.enabled = enabled
+        self.max_events = max_events
+        self.cuda_sync = cuda_sync and torch.cuda.is_available()
+        self.events = []
+        self.totals = OrderedDict()
+        self.counts = OrderedDict()
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self._backward_start = {}
+        self._forward_start = {}
+        self._hook_handles = []
+
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def synchronize(self):
+        if self.cuda_sync:
+            torch.cuda.synchronize()
+
+    def record(self, name, start, end):
+        self.totals[name] = self.totals.get(name, 0) + end - start
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if len(self.events) < self.max_events:
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self.pid,
+                "tid": threading.get_ident()
+            })
+
+    def epoch_infos(self):
+        """
+        Seconds spent per span since last call
+        """
+        infos = {}
+        for name, total in self.totals.items():
+            infos["Profile/{}".format(name)] = total
+        # keep seen names so that logged columns stay the same across epochs
+        self.totals = OrderedDict((name, 0) for name in self.totals)
+        self.counts = OrderedDict((name, 0) for name in self.counts)
+        return infos
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms"
+            }, f)
+
+    def attach_module(self, module, name):
+        """
+        Time forward passes of module as "forward/<name>"
+        """
+        if not self.enabled:
+            return
+        key = "forward/{}".format(name)
+
+        def pre_hook(module, input):
+            self.synchronize()
+            self._forward_start[key] = time.perf_counter()
+
+        def hook(module, input, output):
+            self.synchronize()
+            self.record(key, self._forward_start.pop(key), time.perf_counter())
+
+        self._hook_handles.append(module.register_forward_pre_hook(pre_hook))
+        self._hook_handles.append(module.register_forward_hook(hook))
+
+    def instrument_optimizer(self, optimizer, name):
+        """
+        Time optimizer.step as "optimizer_step/<name>", and time between
+        zero_grad and step (mostly backward) as "backward/<name>"
+        """
+        if not self.enabled:
+            return
+        zero_grad = optimizer.zero_grad
+        step = optimizer.step
+
+        def timed_zero_grad(*args, **kwargs):
+            zero_grad(*args, **kwargs)
+            self._backward_start[name] = time.perf_counter()
+
+        def timed_step(*args, **kwargs):
+            self.synchronize()
+            start = time.perf_counter()
+            if name in self._backward_start:
+                self.record(
+                    "backward/{}".format(name),
+                    self._backward_start.pop(name), start)
+            out = step(*args, **kwargs)
+            self.synchronize()
+            self.record(
+                "optimizer_step/{}".format(name), start, time.perf_counter())
+            return out
+
+        optimizer.zero_grad = timed_zero_grad
+        optimizer.step = timed_step
+
+    def remove_hooks(self):
+        for handle in self._hook_handles:
+            handle.remove()
+        self._hook_handles = []
+
+
+NULL_PROFILER = Profiler(enabled=False)